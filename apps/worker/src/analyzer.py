@@ -6,14 +6,24 @@ the real-time pipeline and the eval script.
 
 from __future__ import annotations
 
+import asyncio
+import base64
+import io
 import json
+import random
+import tempfile
+import time
 from enum import Enum
+from functools import lru_cache
 from pathlib import Path
-from typing import Optional
+from typing import AsyncIterator, Awaitable, Callable, Iterable, Literal, Sequence, TypeVar
 
+import cv2
+import httpx
+import numpy as np
 from google import genai
-from google.genai import types
-from pydantic import BaseModel, Field
+from google.genai import errors, types
+from pydantic import BaseModel, ConfigDict, Field
 
 
 # --- Shared structured output schema ---
@@ -26,21 +36,29 @@ class Activity(str, Enum):
 
 class CatActivity(BaseModel):
     """Per-cat identification with activity classification."""
+    model_config = ConfigDict(extra="ignore", frozen=True)
+
     name: str = Field(description="Cat name (from known cats only)")
     activity: Activity = Field(description="What this cat is doing")
 
 
 class IdentifyResult(BaseModel):
     """Gemini response for cat identification in a single frame."""
+    model_config = ConfigDict(extra="ignore", frozen=True)
+
     cats_present: bool = Field(description="Whether one or more cats are visible")
     cats: list[CatActivity] = Field(
         default_factory=list,
         description="Per-cat identification with activity",
     )
-    description: Optional[str] = Field(None, description="Brief description of the scene")
     confidence: float = Field(0.0, ge=0.0, le=1.0, description="Overall identification confidence")
 
 
+# pydantic-core validator, called directly on the hot path to skip the
+# model_validate_json wrapper
+IDENTIFY_VALIDATOR = IdentifyResult.__pydantic_validator__
+
+
 # --- Constants ---
 
 CAT_NAMES = ["大吉", "小慢", "小黑", "麻酱", "松花"]
@@ -63,6 +81,14 @@ CAT_DESCRIPTIONS: dict[str, str] = {
 # Key difference: 松花 has STRIPES on brown base; 麻酱 has PATCHES of black+orange, no stripes.
 
 
+# --- Client ---
+
+@lru_cache(maxsize=4)
+def get_client(api_key: str) -> genai.Client:
+    """Process-wide Gemini client per API key, so its HTTP connection pool is shared."""
+    return genai.Client(api_key=api_key)
+
+
 # --- Reference photo loading ---
 
 def load_reference_images(refs_dir: Path) -> dict[str, list[bytes]]:
@@ -94,71 +120,525 @@ def load_reference_images(refs_dir: Path) -> dict[str, list[bytes]]:
     return images
 
 
+# --- Image preparation ---
+
+# Default longest edge for images sent to Gemini; 768 px fits one image tile
+# (258 tokens) instead of several for a full 1280x720 frame
+INFER_MAX_EDGE = 768
+
+
+def encode_frame_jpeg(frame: np.ndarray, quality: int = 85) -> bytes:
+    """Encode a BGR frame to JPEG bytes."""
+    _, buf = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    return buf.tobytes()
+
+
+def prepare_inference_frame(
+    frame: np.ndarray,
+    roi: tuple[int, int, int, int] | None,
+    max_edge: int,
+) -> np.ndarray:
+    """Crop to the (x, y, w, h) ROI and shrink so the longest edge is <= max_edge.
+
+    Gemini bills and tiles images at 768px, so anything bigger only costs
+    upload time and tokens. The full-resolution frame is kept for storage.
+    """
+    if roi is not None:
+        x, y, w, h = roi
+        frame = frame[y : y + h, x : x + w]
+    height, width = frame.shape[:2]
+    scale = max_edge / max(height, width) if max_edge else 1.0
+    if scale < 1.0:
+        size = (round(width * scale), round(height * scale))
+        frame = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+    return frame
+
+
+def prepare_inference_jpeg(
+    data: bytes,
+    roi: tuple[int, int, int, int] | None,
+    max_edge: int,
+) -> bytes:
+    """`prepare_inference_frame` for a stored JPEG, so offline tools send what the worker sends.
+
+    Returns `data` unchanged if there is nothing to crop or shrink, or if it
+    can't be decoded (Gemini then gets the original bytes).
+    """
+    img = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+    if img is None:
+        return data
+    out = prepare_inference_frame(img, roi, max_edge)
+    if out.shape == img.shape:
+        return data
+    return encode_frame_jpeg(out)
+
+
 # --- Prompt building ---
 
-def build_identify_prompt(
-    ref_images: dict[str, list[bytes]],
-    test_image: bytes,
-) -> list:
-    """Build multimodal few-shot prompt with reference images and test frame."""
-    parts: list = []
-
-    parts.append(
-        "You are a cat identification system. A fixed camera monitors a feeding area. "
-        "The layout from left to right: water dispenser (white round device) → 3 food bowls with kibble. "
-        "There are 5 known cats. Identify which cat(s) appear in the test image.\n\n"
-        "Rules:\n"
-        "- Only return names from the list below\n"
-        "- A frame may have 0, 1, or multiple cats\n"
-        "- Check edges of the image for partially visible cats\n"
-        "- For each cat, classify their activity:\n"
-        '  - "eating" if eating from a food bowl (center/right bowls)\n'
-        '  - "drinking" if drinking from the water dispenser (white round device on the left)\n'
-        '  - "present" if visible but not eating or drinking (sitting, walking, looking)\n\n'
-        "CONFUSION WARNING: 松花 and 麻酱 look similar from above but differ in pattern:\n"
-        "- 松花 has STRIPES (parallel dark lines on brown/tan base)\n"
-        "- 麻酱 has PATCHES (irregular blocks of black and orange, NO stripes)\n"
-        "Look carefully at the fur pattern before deciding between these two.\n\n"
-        "Known cats and their reference photos:\n"
-    )
+_SYSTEM_PROMPT = (
+    "You are a cat identification system. A fixed camera monitors a feeding area. "
+    "The layout from left to right: water dispenser (white round device) → 3 food bowls with kibble. "
+    "There are 5 known cats. Identify which cat(s) appear in the test image.\n\n"
+    "Rules:\n"
+    "- Only return names from the list below\n"
+    "- A frame may have 0, 1, or multiple cats\n"
+    "- Check edges of the image for partially visible cats\n"
+    "- For each cat, classify their activity:\n"
+    '  - "eating" if eating from a food bowl (center/right bowls)\n'
+    '  - "drinking" if drinking from the water dispenser (white round device on the left)\n'
+    '  - "present" if visible but not eating or drinking (sitting, walking, looking)\n\n'
+    "CONFUSION WARNING: 松花 and 麻酱 look similar from above but differ in pattern:\n"
+    "- 松花 has STRIPES (parallel dark lines on brown/tan base)\n"
+    "- 麻酱 has PATCHES (irregular blocks of black and orange, NO stripes)\n"
+    "Look carefully at the fur pattern before deciding between these two.\n\n"
+    "Known cats and their reference photos:\n"
+)
+
+_CAT_HEADERS: dict[str, str] = {
+    name: f"\n{name} — {CAT_DESCRIPTIONS.get(name, '')}\n" for name in CAT_NAMES
+}
+
+_TEST_HEADER = "\n\nTEST IMAGE — identify the cat(s):\n"
+
+
+@lru_cache(maxsize=64)
+def _jpeg_part(data: bytes) -> types.Part:
+    """Shared Part for a reference JPEG, so every analyzer reuses one object per image.
+
+    Only used for reference images; test frames are unique and would just
+    churn the cache.
+    """
+    return types.Part.from_bytes(data=data, mime_type="image/jpeg")
+
+
+def build_reference_prefix(ref_images: dict[str, list[bytes]]) -> list:
+    """Build the static part of the few-shot prompt (rules + reference images).
+
+    The prefix only depends on the reference images, so callers that analyze
+    many frames should build it once and append `build_test_suffix` per frame.
+    """
+    parts: list = [_SYSTEM_PROMPT]
 
     for cat_name in CAT_NAMES:
         images = ref_images.get(cat_name, [])
         if not images:
             continue
-        desc = CAT_DESCRIPTIONS.get(cat_name, "")
-        parts.append(f"\n{cat_name} — {desc}\n")
+        parts.append(_CAT_HEADERS[cat_name])
         for img_bytes in images:
-            parts.append(types.Part.from_bytes(data=img_bytes, mime_type="image/jpeg"))
-
-    parts.append("\n\nTEST IMAGE — identify the cat(s):\n")
-    parts.append(types.Part.from_bytes(data=test_image, mime_type="image/jpeg"))
+            parts.append(_jpeg_part(img_bytes))
 
     return parts
 
 
+def build_test_suffix(test_image: bytes) -> list:
+    """Build the per-frame tail of the prompt (header + test image)."""
+    return [_TEST_HEADER, types.Part.from_bytes(data=test_image, mime_type="image/jpeg")]
+
+
+def build_identify_prompt(
+    ref_images: dict[str, list[bytes]],
+    test_image: bytes,
+) -> list:
+    """Build multimodal few-shot prompt with reference images and test frame."""
+    return build_reference_prefix(ref_images) + build_test_suffix(test_image)
+
+
 # --- Analyzer ---
 
+# Attempts per frame on the async path (rate limits / transient server errors)
+MAX_ATTEMPTS = 3
+
+
+# Batch job polling
+BATCH_POLL_INTERVAL = 30
+_BATCH_DONE_STATES = {
+    "JOB_STATE_SUCCEEDED",
+    "JOB_STATE_FAILED",
+    "JOB_STATE_CANCELLED",
+    "JOB_STATE_EXPIRED",
+}
+
+
+# Lifetime of an explicit prefix cache, extended while a run keeps using it
+PREFIX_CACHE_TTL = "3600s"
+
+# Extend the prefix cache once less than this many seconds of its TTL are left
+PREFIX_CACHE_REFRESH_MARGIN = 300.0
+
+
+def _part_to_json(part: str | types.Part) -> dict:
+    """Serialize a prompt part to the REST JSON shape used in batch JSONL."""
+    if isinstance(part, str):
+        return {"text": part}
+    blob = part.inline_data
+    return {
+        "inline_data": {
+            "mime_type": blob.mime_type,
+            "data": base64.b64encode(blob.data).decode(),
+        }
+    }
+
+
+def _is_retryable(exc: Exception) -> bool:
+    """True for 429 rate limits, 5xx server errors, timeouts and dropped connections.
+
+    httpx.TransportError covers the HTTP client's own timeouts
+    (httpx.TimeoutException), which are not builtin TimeoutErrors.
+    """
+    if isinstance(exc, (errors.ServerError, TimeoutError, httpx.TransportError)):
+        return True
+    return isinstance(exc, errors.ClientError) and exc.code == 429
+
+
+def _is_cache_miss(exc: Exception) -> bool:
+    """True if a request failed because its cached content expired or was deleted."""
+    return (
+        isinstance(exc, errors.ClientError)
+        and exc.code in (400, 403, 404)
+        and "cache" in str(exc).lower()
+    )
+
+
+_T = TypeVar("_T")
+
+
+async def call_with_retry(fn: Callable[[], Awaitable[_T]], tag: str = "analyzer") -> _T:
+    """Await `fn()`, retrying with exponential backoff on 429/5xx/timeouts/connection errors.
+
+    Makes up to MAX_ATTEMPTS calls; other errors, and the last failure,
+    propagate. `tag` prefixes the retry log line.
+    """
+    for attempt in range(MAX_ATTEMPTS - 1):
+        try:
+            return await fn()
+        except Exception as e:
+            if not _is_retryable(e):
+                raise
+            delay = 2**attempt + random.random()
+            print(f"[{tag}] Retrying in {delay:.1f}s: {e}")
+            await asyncio.sleep(delay)
+    return await fn()
+
+
 class CatAnalyzer:
     """Analyzes camera frames using Gemini to identify cats and classify activity."""
 
-    def __init__(self, api_key: str, refs_dir: Path, model: str = "gemini-2.5-flash"):
-        self.client = genai.Client(api_key=api_key)
+    def __init__(
+        self,
+        api_key: str,
+        refs_dir: Path | None = None,
+        model: str = "gemini-2.5-flash",
+        ref_images: dict[str, list[bytes]] | None = None,
+        ref_max_edge: int = INFER_MAX_EDGE,
+    ):
+        """Load references from `refs_dir`, or use already-loaded `ref_images` (eval).
+
+        References are shrunk to `ref_max_edge` (0 = originals), like the
+        inference frames they are compared against.
+        """
+        self.client = get_client(api_key)
         self.model = model
-        self.ref_images = load_reference_images(refs_dir)
+        if ref_images is None:
+            if refs_dir is None:
+                raise ValueError("CatAnalyzer needs refs_dir or ref_images")
+            ref_images = load_reference_images(refs_dir)
+        self.ref_images = {
+            cat: [prepare_inference_jpeg(img, None, ref_max_edge) for img in images]
+            for cat, images in ref_images.items()
+        }
         loaded = sum(len(imgs) for imgs in self.ref_images.values())
         print(f"[analyzer] Loaded {loaded} reference images for {len(self.ref_images)} cats")
+        # ref_images never change after init, so the prompt prefix is built once
+        self._prompt_prefix = build_reference_prefix(self.ref_images)
+        self._gen_config = types.GenerateContentConfig(
+            response_mime_type="application/json",
+            response_schema=IdentifyResult,
+            temperature=0.1,
+        )
+        self._cache_name: str | None = None
+        self._cache_ttl = PREFIX_CACHE_TTL
+        # time.monotonic() by which the cache must be extended
+        self._cache_deadline = 0.0
+        self._cache_refreshing = False
+
+    def _request(self, frame_bytes: bytes) -> dict:
+        """Build generate_content kwargs for a single frame."""
+        suffix = build_test_suffix(frame_bytes)
+        return {
+            "model": self.model,
+            "contents": suffix if self._cache_name else self._prompt_prefix + suffix,
+            "config": self._gen_config,
+        }
+
+    def cache_prefix(self, ttl: str = PREFIX_CACHE_TTL) -> bool:
+        """Store the reference prefix as Gemini cached content for later live calls.
+
+        Cached tokens are billed at a fraction of the input rate and aren't
+        re-encoded per request, which pays off for long runs over the same
+        references (eval). Returns False, and keeps sending the full prompt,
+        if the API refuses to cache. `analyze_frame_async` extends the TTL
+        as it nears expiry. Pair with `release_cache`.
+        """
+        try:
+            cache = self.client.caches.create(model=self.model, config=self._cache_config(ttl))
+        except errors.APIError as e:
+            print(f"[analyzer] Prefix cache unavailable, sending full prompts: {e}")
+            return False
+        self._use_cache(cache.name, ttl)
+        print(f"[analyzer] Cached reference prefix as {cache.name}")
+        return True
+
+    def _cache_config(self, ttl: str) -> types.CreateCachedContentConfig:
+        """Cached-content config holding the reference prefix."""
+        return types.CreateCachedContentConfig(contents=self._prompt_prefix, ttl=ttl)
+
+    def _use_cache(self, name: str | None, ttl: str = PREFIX_CACHE_TTL) -> None:
+        """Point requests at cached content `name`, or back at the full prompt (None)."""
+        self._cache_name = name
+        self._cache_ttl = ttl
+        self._cache_deadline = time.monotonic() + float(ttl.removesuffix("s")) if name else 0.0
+        self._gen_config = self._gen_config.model_copy(update={"cached_content": name})
+
+    async def _refresh_cache(self) -> None:
+        """Extend the prefix cache's TTL once it is within PREFIX_CACHE_REFRESH_MARGIN of expiry.
+
+        If the cache can't be extended a new one is created; failing that,
+        requests go back to the full prompt. One call refreshes while the
+        others keep using the current cache, which is still valid.
+        """
+        if (
+            self._cache_name is None
+            or self._cache_refreshing
+            or time.monotonic() < self._cache_deadline - PREFIX_CACHE_REFRESH_MARGIN
+        ):
+            return
+        self._cache_refreshing = True
+        name, ttl = self._cache_name, self._cache_ttl
+        try:
+            await self.client.aio.caches.update(
+                name=name, config=types.UpdateCachedContentConfig(ttl=ttl)
+            )
+            self._use_cache(name, ttl)
+        except errors.APIError as e:
+            print(f"[analyzer] Could not extend prefix cache {name}, re-creating: {e}")
+            try:
+                cache = await self.client.aio.caches.create(
+                    model=self.model, config=self._cache_config(ttl)
+                )
+            except errors.APIError as e:
+                print(f"[analyzer] Prefix cache unavailable, sending full prompts: {e}")
+                self._use_cache(None)
+            else:
+                self._use_cache(cache.name, ttl)
+                print(f"[analyzer] Cached reference prefix as {cache.name}")
+        finally:
+            self._cache_refreshing = False
+
+    def release_cache(self) -> None:
+        """Delete the prefix cache (if any) and go back to full prompts."""
+        if self._cache_name is None:
+            return
+        name = self._cache_name
+        self._use_cache(None)
+        try:
+            self.client.caches.delete(name=name)
+        except errors.APIError as e:
+            print(f"[analyzer] Failed to delete prefix cache {name}: {e}")
 
     def analyze_frame(self, frame_bytes: bytes) -> IdentifyResult:
         """Analyze a single frame for cat presence, identity, and activity."""
-        prompt = build_identify_prompt(self.ref_images, frame_bytes)
-        response = self.client.models.generate_content(
-            model=self.model,
-            contents=prompt,
-            config=types.GenerateContentConfig(
-                response_mime_type="application/json",
-                response_schema=IdentifyResult,
-                temperature=0.1,
-            ),
-        )
-        return IdentifyResult.model_validate_json(response.text)
+        response = self.client.models.generate_content(**self._request(frame_bytes))
+        return IDENTIFY_VALIDATOR.validate_json(response.text)
+
+    async def analyze_frame_async(self, frame_bytes: bytes) -> IdentifyResult:
+        """Async variant of analyze_frame with exponential backoff on 429/5xx.
+
+        Keeps the prefix cache (if any) alive, and resends with the full
+        prompt if the cache has expired or been deleted anyway.
+        """
+        await self._refresh_cache()
+        request = self._request(frame_bytes)
+
+        async def _call() -> IdentifyResult:
+            nonlocal request
+            try:
+                response = await self.client.aio.models.generate_content(**request)
+            except Exception as e:
+                cache_name = request["config"].cached_content
+                if not cache_name or not _is_cache_miss(e):
+                    raise
+                print(f"[analyzer] Prefix cache {cache_name} gone, sending full prompts: {e}")
+                if self._cache_name == cache_name:
+                    self._use_cache(None)
+                request = self._request(frame_bytes)
+                response = await self.client.aio.models.generate_content(**request)
+            return IDENTIFY_VALIDATOR.validate_json(response.text)
+
+        return await call_with_retry(_call)
+
+    async def analyze_iter(
+        self,
+        keys: Sequence[str],
+        load: Callable[[str], bytes],
+        concurrency: int = 8,
+    ) -> AsyncIterator[tuple[str, IdentifyResult | Exception]]:
+        """Analyze frames concurrently, yielding (key, result) as each one finishes.
+
+        `load(key)` returns a frame's JPEG bytes. It runs on a worker thread
+        once the frame gets one of the `concurrency` slots, so only in-flight
+        frames are held in memory. A frame that still fails after retries
+        yields its exception instead of aborting the run.
+        """
+        sem = asyncio.Semaphore(concurrency)
+
+        async def _one(key: str) -> tuple[str, IdentifyResult | Exception]:
+            async with sem:
+                try:
+                    frame_bytes = await asyncio.to_thread(load, key)
+                    return key, await self.analyze_frame_async(frame_bytes)
+                except Exception as exc:
+                    return key, exc
+
+        for fut in asyncio.as_completed([_one(k) for k in keys]):
+            yield await fut
+
+    async def analyze(
+        self,
+        keys: Sequence[str],
+        load: Callable[[str], bytes],
+        mode: Literal["live", "batch"] = "live",
+        concurrency: int = 8,
+    ) -> AsyncIterator[tuple[str, IdentifyResult | Exception]]:
+        """Analyze many frames, yielding (key, result) pairs; the offline entry point.
+
+        mode="live" calls the real-time endpoint through `analyze_iter`, with
+        the reference prefix held as cached content for the run, and yields
+        in completion order. mode="batch" submits one Batch API job (cheaper,
+        but may take hours) and yields in `keys` order once it finishes.
+        Failed frames yield an exception either way.
+        """
+        if mode == "batch":
+            by_key = await asyncio.to_thread(
+                self.analyze_batch, ((key, load(key)) for key in keys)
+            )
+            for key in keys:
+                yield key, by_key.get(key) or RuntimeError("missing from batch output")
+            return
+
+        # Every live call shares the reference prefix; send it once as cached content
+        self.cache_prefix()
+        try:
+            async for item in self.analyze_iter(keys, load, concurrency=concurrency):
+                yield item
+        finally:
+            self.release_cache()
+
+    def analyze_batch(
+        self,
+        frames: Iterable[tuple[str, bytes]],
+        poll_interval: float = BATCH_POLL_INTERVAL,
+    ) -> dict[str, IdentifyResult]:
+        """Analyze (key, jpeg_bytes) frames through the Gemini Batch API.
+
+        Much cheaper than live calls but asynchronous (up to 24h turnaround),
+        so only suitable for offline backfills. Blocks until the job finishes.
+
+        Returns:
+            {key: IdentifyResult}; frames that failed are omitted.
+        """
+        prefix, uploaded = self._upload_prefix()
+        try:
+            return self._run_batch(prefix, frames, poll_interval)
+        finally:
+            for name in uploaded:
+                try:
+                    self.client.files.delete(name=name)
+                except errors.APIError as e:
+                    print(f"[analyzer] Failed to delete reference upload {name}: {e}")
+
+    def _upload_prefix(self) -> tuple[list[dict], list[str]]:
+        """Upload each reference image once and return the prefix as JSON parts.
+
+        Batch lines then point at the uploaded files instead of repeating
+        every reference JPEG base64-encoded on each line. Also returns the
+        uploaded file names so the caller can delete them.
+        """
+        prefix: list[dict] = []
+        uploaded: list[str] = []
+        for part in self._prompt_prefix:
+            if isinstance(part, str):
+                prefix.append({"text": part})
+                continue
+            blob = part.inline_data
+            ref = self.client.files.upload(
+                file=io.BytesIO(blob.data),
+                config=types.UploadFileConfig(mime_type=blob.mime_type),
+            )
+            uploaded.append(ref.name)
+            prefix.append({"file_data": {"mime_type": blob.mime_type, "file_uri": ref.uri}})
+        return prefix, uploaded
+
+    def _run_batch(
+        self,
+        prefix: list[dict],
+        frames: Iterable[tuple[str, bytes]],
+        poll_interval: float,
+    ) -> dict[str, IdentifyResult]:
+        """Write, submit and collect one batch job whose requests share `prefix`."""
+        generation_config = {
+            "response_mime_type": "application/json",
+            "response_json_schema": IdentifyResult.model_json_schema(),
+            "temperature": 0.1,
+        }
+
+        with tempfile.NamedTemporaryFile("w", suffix=".jsonl", delete=False) as f:
+            src_path = Path(f.name)
+            count = 0
+            for key, frame_bytes in frames:
+                parts = prefix + [_part_to_json(p) for p in build_test_suffix(frame_bytes)]
+                line = {
+                    "key": key,
+                    "request": {
+                        "contents": [{"role": "user", "parts": parts}],
+                        "generation_config": generation_config,
+                    },
+                }
+                f.write(json.dumps(line, ensure_ascii=False) + "\n")
+                count += 1
+
+        try:
+            src_file = self.client.files.upload(
+                file=src_path,
+                config=types.UploadFileConfig(mime_type="jsonl", display_name=src_path.name),
+            )
+        finally:
+            src_path.unlink(missing_ok=True)
+
+        job = self.client.batches.create(model=self.model, src=src_file.name)
+        print(f"[analyzer] Batch job {job.name} submitted ({count} frames)")
+
+        while job.state.name not in _BATCH_DONE_STATES:
+            time.sleep(poll_interval)
+            job = self.client.batches.get(name=job.name)
+        if job.state.name != "JOB_STATE_SUCCEEDED":
+            raise RuntimeError(f"Batch job {job.name} ended with {job.state.name}: {job.error}")
+
+        # Split the raw download and let json.loads decode one line at a
+        # time, rather than holding a str copy of the whole result file
+        raw = self.client.files.download(file=job.dest.file_name)
+        results: dict[str, IdentifyResult] = {}
+        for line in raw.splitlines():
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            key = item.get("key", "?")
+            if "response" not in item:
+                print(f"[analyzer] Batch item {key} failed: {item.get('error')}")
+                continue
+            try:
+                text = types.GenerateContentResponse.model_validate(item["response"]).text
+                results[key] = IDENTIFY_VALIDATOR.validate_json(text)
+            except Exception as e:
+                print(f"[analyzer] Batch item {key} unparseable: {e}")
+        print(f"[analyzer] Batch job {job.name} done: {len(results)}/{count} frames")
+        return results
@@ -2,8 +2,11 @@
 
 from __future__ import annotations
 
-import select
+import fcntl
+import queue
+import selectors
 import subprocess
+import threading
 import time
 from typing import Generator
 
@@ -18,19 +21,21 @@ CAPTURE_HEIGHT = 720
 # Timeout for detecting a stalled stream (seconds)
 READ_TIMEOUT = 30
 
+# ffmpeg stdout pipe size; 1 MiB is the default unprivileged Linux maximum
+PIPE_SIZE = 1 << 20
 
-def create_ffmpeg_process(rtmp_url: str, fps_interval: int | None = None) -> subprocess.Popen:
-    """Start ffmpeg process to read RTMP stream and output raw frames to stdout.
+
+def build_ffmpeg_cmd(rtmp_url: str, interval: int) -> list[str]:
+    """Build the ffmpeg argv that reads an RTMP stream and writes raw frames to stdout.
 
     Args:
         rtmp_url: RTMP stream URL
-        fps_interval: Seconds between frames (default: from settings)
+        interval: Seconds between frames
     """
-    interval = fps_interval or get_settings().frame_interval
     vf = f"fps=1/{interval},scale={CAPTURE_WIDTH}:{CAPTURE_HEIGHT}"
     # rw_timeout: microseconds; abort if no data for 30s at network level
     rw_timeout = str(READ_TIMEOUT * 1_000_000)
-    cmd = [
+    return [
         "ffmpeg",
         "-rw_timeout", rw_timeout,
         "-i", rtmp_url,
@@ -41,24 +46,48 @@ def create_ffmpeg_process(rtmp_url: str, fps_interval: int | None = None) -> sub
         "-loglevel", "error",
         "-",                      # output to stdout
     ]
-    return subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
 
 
-def _read_exact(pipe, size: int, timeout: float) -> bytes:
-    """Read exactly `size` bytes from pipe with a per-read timeout.
+def create_ffmpeg_process(cmd: list[str]) -> subprocess.Popen:
+    """Start an ffmpeg process from a prebuilt argv (see build_ffmpeg_cmd).
+
+    stdout is unbuffered so each readinto is a single read(2) straight into
+    the caller's frame buffer and select() sees exactly what is pending.
+    """
+    process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, bufsize=0)
+    # Bigger pipe -> fewer select/read wakeups per frame (Linux only, best effort)
+    if hasattr(fcntl, "F_SETPIPE_SZ"):
+        try:
+            fcntl.fcntl(process.stdout.fileno(), fcntl.F_SETPIPE_SZ, PIPE_SIZE)
+        except OSError:
+            pass
+    return process
 
+
+def _read_exact(
+    pipe,
+    sel: selectors.BaseSelector,
+    buf: memoryview,
+    timeout: float,
+) -> int:
+    """Fill `buf` from pipe with a per-read timeout.
+
+    `sel` must already have `pipe` registered for EVENT_READ; registering once
+    per process keeps the epoll set out of the per-chunk loop.
+
+    Returns the number of bytes read (less than len(buf) on EOF).
     Raises TimeoutError if no data arrives within `timeout` seconds.
     """
-    buf = bytearray()
-    while len(buf) < size:
-        ready, _, _ = select.select([pipe], [], [], timeout)
-        if not ready:
+    size = len(buf)
+    offset = 0
+    while offset < size:
+        if not sel.select(timeout):
             raise TimeoutError(f"No data for {timeout}s")
-        chunk = pipe.read(size - len(buf))
-        if not chunk:
+        n = pipe.readinto(buf[offset:])
+        if not n:
             break
-        buf.extend(chunk)
-    return bytes(buf)
+        offset += n
+    return offset
 
 
 def capture_frames(
@@ -70,6 +99,9 @@ def capture_frames(
     Each frame is scaled to CAPTURE_WIDTH x CAPTURE_HEIGHT.
     Automatically reconnects on stream stalls or disconnects.
 
+    The same preallocated array is filled and yielded for every frame;
+    callers that keep a frame past the next iteration must copy it.
+
     Args:
         rtmp_url: RTMP stream URL
         fps_interval: Override frame interval (seconds)
@@ -77,33 +109,93 @@ def capture_frames(
     Yields:
         numpy array (BGR, 1280x720) for each captured frame
     """
-    frame_size = CAPTURE_WIDTH * CAPTURE_HEIGHT * 3
+    frame = np.empty((CAPTURE_HEIGHT, CAPTURE_WIDTH, 3), dtype=np.uint8)
+    frame_buf = memoryview(frame).cast("B")
+    frame_size = frame.nbytes
     # Allow more time for the first frame (connection + keyframe wait)
     first_frame_timeout = READ_TIMEOUT * 3
     interval = fps_interval or get_settings().frame_interval
     frame_timeout = max(READ_TIMEOUT, interval * 3)
+    # Same argv on every reconnect
+    cmd = build_ffmpeg_cmd(rtmp_url, interval)
 
     while True:
-        process = create_ffmpeg_process(rtmp_url, fps_interval)
+        process = create_ffmpeg_process(cmd)
+        sel = selectors.DefaultSelector()
+        sel.register(process.stdout, selectors.EVENT_READ)
         first = True
         try:
             while True:
                 timeout = first_frame_timeout if first else frame_timeout
-                raw = _read_exact(process.stdout, frame_size, timeout)
+                n = _read_exact(process.stdout, sel, frame_buf, timeout)
                 first = False
-                if len(raw) != frame_size:
+                if n != frame_size:
                     break
-                frame = np.frombuffer(raw, dtype=np.uint8).reshape(
-                    (CAPTURE_HEIGHT, CAPTURE_WIDTH, 3)
-                )
                 yield frame
         except TimeoutError as e:
             print(f"[capture] Stream stalled: {e}")
         except Exception as e:
             print(f"[capture] Stream error: {e}")
         finally:
+            sel.close()
             process.kill()
             process.wait()
 
         print("[capture] Stream disconnected, reconnecting in 5s...")
         time.sleep(5)
+
+
+def prefetch_frames(
+    rtmp_url: str,
+    fps_interval: int | None = None,
+    depth: int = 2,
+) -> Generator[np.ndarray, None, None]:
+    """Like capture_frames, but read the stream on a background thread.
+
+    Frames keep arriving while the caller is blocked (e.g. on a Gemini call)
+    instead of backing up in the ffmpeg pipe. At most `depth` frames wait in
+    the queue; when it is full the oldest frame is dropped so the caller
+    always sees recent frames.
+
+    Each yielded array stays valid until the next iteration.
+    """
+    frames: queue.Queue = queue.Queue(maxsize=depth)
+    # Buffers: `depth` queued + 1 being filled + 1 held by the caller
+    free: queue.Queue = queue.Queue()
+    for _ in range(depth + 2):
+        free.put(np.empty((CAPTURE_HEIGHT, CAPTURE_WIDTH, 3), dtype=np.uint8))
+    stop = threading.Event()
+
+    def _reader() -> None:
+        try:
+            for frame in capture_frames(rtmp_url, fps_interval):
+                if stop.is_set():
+                    return
+                buf = free.get()
+                np.copyto(buf, frame)
+                while True:
+                    try:
+                        frames.put_nowait(buf)
+                        break
+                    except queue.Full:
+                        try:
+                            free.put(frames.get_nowait())  # drop oldest
+                        except queue.Empty:
+                            pass
+        except BaseException as e:
+            frames.put(e)
+
+    threading.Thread(target=_reader, name="frame-prefetch", daemon=True).start()
+
+    held: np.ndarray | None = None
+    try:
+        while True:
+            item = frames.get()
+            if isinstance(item, BaseException):
+                raise item
+            if held is not None:
+                free.put(held)
+            held = item
+            yield item
+    finally:
+        stop.set()
@@ -2,8 +2,12 @@
 
 Cleans up:
 1. Storage bucket objects (purrview-frames/) — the actual JPEG files
-2. purrview_frames DB rows — frame metadata
-3. purrview_feeding_events DB rows — event records
+2. purrview_feeding_events DB rows — event records, deleted server-side by the
+   purrview_delete_events RPC (migration 003), only once their storage is purged
+3. purrview_frames DB rows — frame metadata, removed by ON DELETE CASCADE
+
+Events whose storage purge fails are kept so the next run retries them, and
+the command exits non-zero.
 
 Usage:
     cd apps/worker
@@ -15,13 +19,39 @@ Usage:
 from __future__ import annotations
 
 import argparse
+import sys
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
 
 from .storage import PurrviewStorage
 
+# Storage list/remove calls are independent HTTP round-trips
+PURGE_WORKERS = 16
+
+
+def _purge_event_files(storage: PurrviewStorage, eid: str) -> int | None:
+    """Delete all storage objects under {eid}/.
+
+    Returns the number removed, or None if the purge failed.
+    """
+    try:
+        files = storage.client.storage.from_(storage.BUCKET).list(eid)
+        if not files:
+            return 0
+        paths = [f"{eid}/{f['name']}" for f in files]
+        storage.client.storage.from_(storage.BUCKET).remove(paths)
+        return len(paths)
+    except Exception as e:
+        print(f"[cleanup] Storage delete error for {eid}: {e}")
+        return None
+
 
-def run_cleanup(retention_days: int = 14, dry_run: bool = False) -> None:
-    """Delete Supabase data older than retention_days."""
+def run_cleanup(retention_days: int = 14, dry_run: bool = False) -> list[str]:
+    """Delete Supabase data older than retention_days.
+
+    Returns the ids of events whose storage purge failed; those events are
+    left in place for the next run.
+    """
     storage = PurrviewStorage()
     cutoff = datetime.now(tz=timezone.utc) - timedelta(days=retention_days)
     cutoff_iso = cutoff.isoformat()
@@ -40,39 +70,32 @@ def run_cleanup(retention_days: int = 14, dry_run: bool = False) -> None:
 
     if not old_event_ids:
         print("[cleanup] Nothing to clean up")
-        return
+        return []
 
     if dry_run:
         print("[cleanup] Dry run — not deleting")
-        return
+        return []
 
     # 2. Delete storage objects (each event has a folder: {event_id}/*.jpg)
-    deleted_files = 0
-    for eid in old_event_ids:
-        try:
-            files = storage.client.storage.from_(storage.BUCKET).list(eid)
-            if files:
-                paths = [f"{eid}/{f['name']}" for f in files]
-                storage.client.storage.from_(storage.BUCKET).remove(paths)
-                deleted_files += len(paths)
-        except Exception as e:
-            print(f"[cleanup] Storage delete error for {eid}: {e}")
-
-    print(f"[cleanup] Deleted {deleted_files} storage files")
-
-    # 3. Delete frame DB rows
-    storage.client.table("purrview_frames").delete().in_(
-        "feeding_event_id", old_event_ids
-    ).execute()
-    print(f"[cleanup] Deleted frame records")
-
-    # 4. Delete event DB rows
-    storage.client.table("purrview_feeding_events").delete().in_(
-        "id", old_event_ids
-    ).execute()
-    print(f"[cleanup] Deleted {len(old_event_ids)} event records")
-
-    print("[cleanup] Done")
+    with ThreadPoolExecutor(max_workers=PURGE_WORKERS) as ex:
+        purged = list(ex.map(lambda eid: _purge_event_files(storage, eid), old_event_ids))
+
+    failed_ids = [eid for eid, n in zip(old_event_ids, purged) if n is None]
+    purged_ids = [eid for eid, n in zip(old_event_ids, purged) if n is not None]
+    print(f"[cleanup] Deleted {sum(n for n in purged if n)} storage files")
+
+    # 3. Delete the purged events server-side (frame rows cascade)
+    if purged_ids:
+        result = storage.client.rpc("purrview_delete_events", {"event_ids": purged_ids}).execute()
+        print(f"[cleanup] Deleted {len(result.data)} event records (frame records cascade)")
+
+    if failed_ids:
+        print(f"[cleanup] Storage purge failed for {len(failed_ids)} events; kept for next run:")
+        for eid in failed_ids:
+            print(f"  {eid}")
+    else:
+        print("[cleanup] Done")
+    return failed_ids
 
 
 def main() -> None:
@@ -80,7 +103,9 @@ def main() -> None:
     parser.add_argument("--days", type=int, default=14, help="Retention days (default: 14)")
     parser.add_argument("--dry-run", action="store_true", help="Preview without deleting")
     args = parser.parse_args()
-    run_cleanup(retention_days=args.days, dry_run=args.dry_run)
+    failed_ids = run_cleanup(retention_days=args.days, dry_run=args.dry_run)
+    if failed_ids:
+        sys.exit(1)
 
 
 if __name__ == "__main__":
@@ -13,6 +13,8 @@ import argparse
 import json
 import sys
 import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime, timezone
 from pathlib import Path
 
@@ -26,18 +28,62 @@ MOTION_THRESHOLD = 5000
 THUMB_WIDTH = 220
 THUMB_HEIGHT = 124
 
+# Motion is diffed on a frame shrunk by this factor per side; changed-pixel
+# counts are scaled back up so scores stay in full-resolution pixel units.
+MOTION_DOWNSCALE = 4
+
+# JPEG encodes release the GIL, so a couple of writer threads keep the capture
+# loop from waiting on libjpeg and the disk.
+WRITE_WORKERS = 2
+
+# Frame writes allowed in flight; past this the capture loop waits for the
+# oldest one rather than queueing more full-size frame copies in memory
+MAX_PENDING_WRITES = 8
+
+
+def motion_frame(frame: np.ndarray) -> np.ndarray:
+    """Shrink a BGR frame to the small grayscale image used for differencing.
+
+    The result is a fresh array, so it can be kept as the previous frame
+    without copying the (reused) capture buffer.
+    """
+    h, w = frame.shape[:2]
+    small = cv2.resize(
+        frame, (w // MOTION_DOWNSCALE, h // MOTION_DOWNSCALE), interpolation=cv2.INTER_AREA
+    )
+    return cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+
 
 def compute_motion_score(current: np.ndarray, previous: np.ndarray | None) -> int:
     """Compute a simple motion score by frame differencing.
 
-    Returns the number of pixels that changed significantly between frames.
+    Both inputs come from `motion_frame`. Returns the approximate number of
+    full-resolution pixels that changed significantly between frames.
     """
     if previous is None:
         return 0
     diff = cv2.absdiff(current, previous)
-    gray = cv2.cvtColor(diff, cv2.COLOR_BGR2GRAY)
-    _, thresh = cv2.threshold(gray, 25, 255, cv2.THRESH_BINARY)
-    return int(cv2.countNonZero(thresh))
+    _, thresh = cv2.threshold(diff, 25, 255, cv2.THRESH_BINARY)
+    return int(cv2.countNonZero(thresh)) * MOTION_DOWNSCALE * MOTION_DOWNSCALE
+
+
+def _write_frame(frame: np.ndarray, filepath: Path, thumb_path: Path) -> None:
+    """Save a full frame and its thumbnail as JPEGs (OSError if either write fails)."""
+    if not cv2.imwrite(str(filepath), frame, [cv2.IMWRITE_JPEG_QUALITY, 90]):
+        raise OSError(f"could not write {filepath}")
+    thumb = cv2.resize(frame, (THUMB_WIDTH, THUMB_HEIGHT))
+    if not cv2.imwrite(str(thumb_path), thumb, [cv2.IMWRITE_JPEG_QUALITY, 70]):
+        raise OSError(f"could not write {thumb_path}")
+
+
+def _write_succeeded(future: Future) -> bool:
+    """Wait for a frame write and log it if it failed."""
+    try:
+        future.result()
+        return True
+    except Exception as e:
+        print(f"[collect] Frame write failed: {e}", flush=True)
+        return False
 
 
 def _ensure_gallery_html(out: Path) -> None:
@@ -82,10 +128,13 @@ def run_collection(
     print(f"[collect] Resolution: {CAPTURE_WIDTH}x{CAPTURE_HEIGHT}", flush=True)
     print(flush=True)
 
-    prev_frame: np.ndarray | None = None
+    prev_small: np.ndarray | None = None
     frame_count = 0
     motion_frames = 0
     start_time = time.time()
+    writer = ThreadPoolExecutor(max_workers=WRITE_WORKERS)
+    pending_writes: deque[Future] = deque()
+    write_errors = 0
 
     try:
         meta_file = open(meta_path, "a")
@@ -96,17 +145,20 @@ def run_collection(
                 break
 
             ts = datetime.now(timezone.utc)
-            motion_score = compute_motion_score(frame, prev_frame)
-            prev_frame = frame.copy()
+            small = motion_frame(frame)
+            motion_score = compute_motion_score(small, prev_small)
+            prev_small = small
 
-            # Save full frame as JPEG
+            # Save full frame + thumbnail off the capture loop. The capture
+            # buffer is reused for the next frame, so hand the writer a copy.
             filename = f"{ts.strftime('%H%M%S')}_{frame_count:05d}.jpg"
-            filepath = out / filename
-            cv2.imwrite(str(filepath), frame, [cv2.IMWRITE_JPEG_QUALITY, 90])
-
-            # Save thumbnail
-            thumb = cv2.resize(frame, (THUMB_WIDTH, THUMB_HEIGHT))
-            cv2.imwrite(str(thumb_dir / filename), thumb, [cv2.IMWRITE_JPEG_QUALITY, 70])
+            while pending_writes and (
+                pending_writes[0].done() or len(pending_writes) >= MAX_PENDING_WRITES
+            ):
+                write_errors += not _write_succeeded(pending_writes.popleft())
+            pending_writes.append(
+                writer.submit(_write_frame, frame.copy(), out / filename, thumb_dir / filename)
+            )
 
             has_motion = motion_score > MOTION_THRESHOLD
             if has_motion:
@@ -120,12 +172,12 @@ def run_collection(
                 "has_motion": has_motion,
             }
             meta_file.write(json.dumps(entry) + "\n")
-            meta_file.flush()
 
             frame_count += 1
 
-            # Progress every 10 frames
+            # Flush metadata + progress every 10 frames
             if frame_count % 10 == 0:
+                meta_file.flush()
                 pct = elapsed / duration * 100
                 print(
                     f"[collect] {frame_count} frames | "
@@ -138,11 +190,15 @@ def run_collection(
     except KeyboardInterrupt:
         print("\n[collect] Stopped by user")
     finally:
+        for future in pending_writes:
+            write_errors += not _write_succeeded(future)
+        writer.shutdown(wait=True)
         meta_file.close()
 
     print(f"\n[collect] Done!", flush=True)
     print(f"  Total frames:  {frame_count}", flush=True)
     print(f"  With motion:   {motion_frames}", flush=True)
+    print(f"  Write errors:  {write_errors}", flush=True)
     print(f"  Output dir:    {out}", flush=True)
 
 
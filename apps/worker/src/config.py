@@ -3,6 +3,7 @@
 from __future__ import annotations
 
 from pathlib import Path
+from typing import NamedTuple
 
 from pydantic import Field
 from pydantic_settings import BaseSettings
@@ -12,11 +13,26 @@ _PROJECT_ROOT = Path(__file__).resolve().parents[3]  # worker/src -> worker -> a
 _ENV_FILE = _PROJECT_ROOT / ".env"
 
 
-class Settings(BaseSettings):
-    """Application settings loaded from environment variables."""
+class InferenceSettings(BaseSettings):
+    """How frames are prepared for Gemini, loaded from environment variables.
+
+    Needs no credentials, so the offline tools (eval, replay) can match the
+    worker with only GEMINI_API_KEY configured.
+    """
 
     model_config = {"env_file": str(_ENV_FILE), "env_file_encoding": "utf-8", "extra": "ignore"}
 
+    frame_roi: tuple[int, int, int, int] | None = Field(
+        None, description="Crop (x, y, w, h) applied before Gemini; unset = full frame"
+    )
+    infer_max_edge: int = Field(
+        768, description="Longest edge of frames sent to Gemini (0 = no resize)"
+    )
+
+
+class Settings(InferenceSettings):
+    """Application settings loaded from environment variables."""
+
     # Supabase
     supabase_url: str = Field(..., description="Supabase project URL")
     supabase_key: str = Field(..., description="Supabase service role key")
@@ -39,14 +55,13 @@ class Settings(BaseSettings):
     lark_webhook_url: str = Field("", description="Lark webhook URL (empty = disabled)")
 
 
-class ROI:
+class ROI(NamedTuple):
     """Region of Interest for a food bowl."""
 
-    def __init__(self, x1: int, y1: int, x2: int, y2: int):
-        self.x1 = x1
-        self.y1 = y1
-        self.x2 = x2
-        self.y2 = y2
+    x1: int
+    y1: int
+    x2: int
+    y2: int
 
     def crop(self, frame):
         """Crop a frame to this ROI region."""
@@ -54,6 +69,7 @@ class ROI:
 
 
 _settings: Settings | None = None
+_inference_settings: InferenceSettings | None = None
 
 
 def get_settings() -> Settings:
@@ -62,3 +78,11 @@ def get_settings() -> Settings:
     if _settings is None:
         _settings = Settings()
     return _settings
+
+
+def get_inference_settings() -> InferenceSettings:
+    """Lazy-load just the frame preparation settings (no credentials required)."""
+    global _inference_settings
+    if _inference_settings is None:
+        _inference_settings = InferenceSettings()
+    return _inference_settings
@@ -1,4 +1,4 @@
-"""OpenCV MOG2 motion detection in food bowl ROI regions."""
+"""Running-average motion detection in food bowl ROI regions."""
 
 from __future__ import annotations
 
@@ -7,19 +7,25 @@ import numpy as np
 
 from .config import ROI, get_settings
 
+# Frames the background model effectively remembers (MOG2's old history).
+# The learning rate is 1/min(frames seen, BACKGROUND_HISTORY), as in MOG2.
+BACKGROUND_HISTORY = 500
+# Per-pixel gray difference from the background that counts as foreground
+DIFF_THRESHOLD = 25
+
 
 class MotionDetector:
-    """Detects motion in food bowl regions using MOG2 background subtraction."""
+    """Detects motion in food bowl regions by differencing against a running-average background.
+
+    Much cheaper per frame than a Gaussian-mixture model, which matters more
+    than modelling multi-modal backgrounds for a fixed camera over still bowls.
+    """
 
     def __init__(self, threshold: int | None = None):
-        self.bg_subtractor = cv2.createBackgroundSubtractorMOG2(
-            history=500,
-            varThreshold=50,
-            detectShadows=True,
-        )
         self.threshold = threshold or get_settings().motion_threshold
-        # Morphological kernel for noise removal
-        self.kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (5, 5))
+        # 3x3 opening removes speckle noise; holes don't matter to countNonZero
+        self.kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (3, 3))
+        self.reset()
 
     def detect(self, frame: np.ndarray, roi: ROI) -> tuple[bool, int]:
         """Check if there is motion in the given ROI.
@@ -31,23 +37,24 @@ class MotionDetector:
         Returns:
             Tuple of (motion_detected: bool, pixel_count: int)
         """
-        cropped = roi.crop(frame)
-        fg_mask = self.bg_subtractor.apply(cropped)
-
-        # Remove shadows (MOG2 marks shadows as 127, foreground as 255)
-        _, fg_mask = cv2.threshold(fg_mask, 200, 255, cv2.THRESH_BINARY)
+        gray = cv2.cvtColor(roi.crop(frame), cv2.COLOR_BGR2GRAY)
+        if self._background is None or self._background.shape != gray.shape:
+            self._background = gray.astype(np.float32)
+            self._frames = 0
+
+        diff = cv2.absdiff(gray, cv2.convertScaleAbs(self._background))
+        self._frames += 1
+        cv2.accumulateWeighted(
+            gray, self._background, 1.0 / min(self._frames, BACKGROUND_HISTORY)
+        )
+        _, fg_mask = cv2.threshold(diff, DIFF_THRESHOLD, 255, cv2.THRESH_BINARY)
 
-        # Morphological operations to reduce noise
         fg_mask = cv2.morphologyEx(fg_mask, cv2.MORPH_OPEN, self.kernel)
-        fg_mask = cv2.morphologyEx(fg_mask, cv2.MORPH_CLOSE, self.kernel)
 
         pixel_count = cv2.countNonZero(fg_mask)
         return pixel_count > self.threshold, pixel_count
 
     def reset(self) -> None:
         """Reset the background model."""
-        self.bg_subtractor = cv2.createBackgroundSubtractorMOG2(
-            history=500,
-            varThreshold=50,
-            detectShadows=True,
-        )
+        self._background: np.ndarray | None = None
+        self._frames = 0
@@ -25,48 +25,39 @@ from .storage import PurrviewStorage
 GEMINI_COST_PER_CALL = 0.0026
 
 
-def _query_daily_counts(
+def _query_digest_counts(
     storage: PurrviewStorage,
-    date_start: str,
-    date_end: str,
-) -> dict[str, dict[str, int]]:
-    """Query feeding event counts grouped by cat_name and activity for a date range.
+    week_start: str,
+    day_start: str,
+    day_end: str,
+) -> tuple[dict[str, dict[str, int]], dict[str, dict[str, int]], int]:
+    """Query feeding event counts per cat and activity for the digest day and the week before it.
+
+    One purrview_digest_counts call groups both windows in Postgres, bucketed
+    by whether the event started before `day_start`, and also returns the
+    number of frames captured on the digest day (proxy for Gemini API calls).
 
     Returns:
+        (day_counts, week_counts, frame_count), the counts each
         {cat_name: {"eating": N, "drinking": N}}
     """
-    result = (
-        storage.client.table("purrview_feeding_events")
-        .select("cat_name, activity")
-        .gte("started_at", date_start)
-        .lt("started_at", date_end)
-        .execute()
-    )
-    counts: dict[str, dict[str, int]] = {}
+    result = storage.client.rpc(
+        "purrview_digest_counts",
+        {"week_start": week_start, "day_start": day_start, "day_end": day_end},
+    ).execute()
+    buckets: dict[str, dict[str, dict[str, int]]] = {"yesterday": {}, "week": {}}
+    frame_count = 0
     for row in result.data:
-        name = row.get("cat_name") or "Unknown"
-        act = row.get("activity") or "eating"
+        if row["bucket"] == "frames":
+            frame_count = row["n"]
+            continue
+        counts = buckets[row["bucket"]]
+        name = row["cat_name"]
         if name not in counts:
             counts[name] = {"eating": 0, "drinking": 0}
-        if act in counts[name]:
-            counts[name][act] += 1
-    return counts
-
-
-def _query_frame_count(
-    storage: PurrviewStorage,
-    date_start: str,
-    date_end: str,
-) -> int:
-    """Count frames captured yesterday (proxy for Gemini API calls)."""
-    result = (
-        storage.client.table("purrview_frames")
-        .select("id", count="exact")
-        .gte("captured_at", date_start)
-        .lt("captured_at", date_end)
-        .execute()
-    )
-    return result.count or 0
+        if row["activity"] in counts[name]:
+            counts[name][row["activity"]] += row["n"]
+    return buckets["yesterday"], buckets["week"], frame_count
 
 
 def _get_worker_status() -> str:
@@ -123,8 +114,9 @@ def build_digest(
     # 7-day window (excluding yesterday to avoid double counting)
     week_start = y_start - timedelta(days=7)
 
-    yesterday_counts = _query_daily_counts(storage, y_start.isoformat(), y_end.isoformat())
-    week_counts = _query_daily_counts(storage, week_start.isoformat(), y_start.isoformat())
+    yesterday_counts, week_counts, frame_count = _query_digest_counts(
+        storage, week_start.isoformat(), y_start.isoformat(), y_end.isoformat()
+    )
 
     cats: dict[str, dict] = {}
     total_eating = 0
@@ -156,7 +148,6 @@ def build_digest(
         total_drinking += yc["drinking"]
 
     # System stats: frame count as proxy for Gemini calls
-    frame_count = _query_frame_count(storage, y_start.isoformat(), y_end.isoformat())
     # Each event has ~1 saved frame, but Gemini is called on every motion trigger.
     # Use total events (eating + drinking) + some overhead as rough call estimate.
     # More accurate: frames saved ≈ successful calls that found cats.
@@ -218,7 +209,10 @@ def run_digest(dry_run: bool = False) -> None:
         print("[digest] Lark webhook not configured, skipping.")
         return
 
-    success = notifier.send_daily_digest(digest)
+    try:
+        success = notifier.send_daily_digest(digest)
+    finally:
+        notifier.close()
     if success:
         print("\n[digest] Sent to Lark.")
     else:
@@ -14,36 +14,73 @@ Usage:
 from __future__ import annotations
 
 import argparse
+import asyncio
 import json
 import re
 import sys
-import time
-from collections import defaultdict
+from bisect import bisect_right
+from collections import Counter, defaultdict
+from functools import lru_cache
+from itertools import product
 from pathlib import Path
-
-from google import genai
-from google.genai import types
+from typing import Literal
 
 from .analyzer import (
     Activity,
     CatActivity,
+    CatAnalyzer,
     IdentifyResult,
     CAT_NAMES,
     CAT_DESCRIPTIONS,
-    build_identify_prompt,
+    prepare_inference_jpeg,
 )
+from .config import get_inference_settings
+from .frames import list_frame_files
 from .label import _load_api_key
 
 
 REFS_PER_CAT = 3
 
-# Keywords for parsing activity from cat_description text
-_DRINKING_PATTERN = re.compile(
-    r"drink|water dispenser|water fountain|water bowl", re.IGNORECASE
+# Keywords for parsing activity from cat_description text, one named group
+# per activity so a single scan finds both
+_ACTIVITY_PATTERN = re.compile(
+    r"(?P<drinking>drink|water dispenser|water fountain|water bowl)"
+    r"|(?P<eating>\beat|eating|eats|food bowl)",
+    re.IGNORECASE,
 )
-_EATING_PATTERN = re.compile(
-    r"\beat|eating|eats|food bowl", re.IGNORECASE
+
+# Color/type hints for matching description text to cat names
+_CAT_HINTS: dict[str, list[str]] = {
+    "大吉": ["orange", "ginger", "light-colored", "light brown", "light orange"],
+    "小慢": ["calico"],
+    "小黑": ["black", "dark-colored", "dark cat"],
+    "麻酱": ["tortoiseshell", "darker cat"],
+    "松花": ["tabby", "striped", "brown tabby"],
+}
+_HINT_TO_CAT = {hint: cat for cat, hints in _CAT_HINTS.items() for hint in hints}
+# Every hint in one alternation, longest first. Matches don't overlap, which
+# is safe here: hints that overlap belong to the same cat, or (light brown
+# tabby) still leave a separate "tabby" match for the other cat.
+_HINT_PATTERN = re.compile(
+    "|".join(re.escape(h) for h in sorted(_HINT_TO_CAT, key=len, reverse=True))
 )
+# Sentence-like segments of a description
+_SEGMENT_SPLIT = re.compile(r"[.;,]|(?:and )")
+
+
+# gallery_meta fields eval reads; the rest of each entry isn't kept in memory
+_META_FIELDS = ("filename", "timestamp", "motion_score", "cat_description")
+
+
+def load_meta(meta_path: Path) -> dict[str, dict]:
+    """Load gallery_meta.jsonl as {filename: entry}, keeping only the fields eval uses."""
+    meta_by_file: dict[str, dict] = {}
+    with open(meta_path, "rb") as f:
+        for line in f:
+            if line.strip():
+                entry = json.loads(line)
+                meta_by_file[entry["filename"]] = {k: entry[k] for k in _META_FIELDS if k in entry}
+    return meta_by_file
 
 
 # --- Reference photo selection ---
@@ -128,11 +165,16 @@ def parse_activity_labels(
     return result
 
 
+@lru_cache(maxsize=4096)
 def _classify_text(text: str) -> str:
-    """Classify activity from description text."""
-    if _DRINKING_PATTERN.search(text):
+    """Classify activity from description text (drinking wins over eating).
+
+    Cached: many frames share the same description or segment text.
+    """
+    found = {m.lastgroup for m in _ACTIVITY_PATTERN.finditer(text)}
+    if "drinking" in found:
         return "drinking"
-    if _EATING_PATTERN.search(text):
+    if "eating" in found:
         return "eating"
     return "present"
 
@@ -143,26 +185,19 @@ def _parse_multi_cat_activity(desc: str, cats: list[str]) -> dict[str, str]:
     Looks for cat color/type mentions near activity keywords.
     Falls back to frame-level classification if parsing fails.
     """
-    # Color/type hints for matching description text to cat names
-    cat_hints: dict[str, list[str]] = {
-        "大吉": ["orange", "ginger", "light-colored", "light brown", "light orange"],
-        "小慢": ["calico"],
-        "小黑": ["black", "dark-colored", "dark cat"],
-        "麻酱": ["tortoiseshell", "darker cat"],
-        "松花": ["tabby", "striped", "brown tabby"],
-    }
+    segments = _SEGMENT_SPLIT.split(desc)
+    starts = [0] + [m.end() for m in _SEGMENT_SPLIT.finditer(desc)]
 
-    activities: dict[str, str] = {}
-    # Split into sentence-like segments
-    segments = re.split(r"[.;,]|(?:and )", desc)
+    # Segments mentioning each cat, from a single scan over the description
+    mentions: dict[str, set[int]] = defaultdict(set)
+    for m in _HINT_PATTERN.finditer(desc):
+        mentions[_HINT_TO_CAT[m.group()]].add(bisect_right(starts, m.start()) - 1)
 
+    activities: dict[str, str] = {}
     for cat in cats:
-        hints = cat_hints.get(cat, [])
-        # Find segments mentioning this cat
-        cat_segments = [s for s in segments if any(h in s for h in hints)]
-        if cat_segments:
+        if cat in mentions:
             # Classify from cat-specific text
-            combined = " ".join(cat_segments)
+            combined = " ".join(segments[i] for i in sorted(mentions[cat]))
             activities[cat] = _classify_text(combined)
         else:
             # Fall back to whole description
@@ -179,8 +214,19 @@ def evaluate(
     limit: int = 0,
     dry_run: bool = False,
     model: str = "gemini-2.5-flash",
+    mode: Literal["live", "batch"] = "live",
+    concurrency: int = 8,
+    ref_max_edge: int | None = None,
 ) -> None:
-    """Run cat identification evaluation on labeled data."""
+    """Run cat identification evaluation on labeled data.
+
+    mode="batch" submits every test frame as one Gemini Batch API job
+    (cheaper, but may take hours); mode="live" calls the real-time endpoint
+    with up to `concurrency` requests in flight. Test frames get the
+    worker's frame_roi crop and infer_max_edge downscale, so eval measures
+    what production sends; references are downscaled to `ref_max_edge`
+    (default: infer_max_edge, as in the worker; 0 = send originals).
+    """
     date_dir = Path(output_dir) / date
     meta_path = date_dir / "gallery_meta.jsonl"
     labels_path = date_dir / "labels.json"
@@ -194,12 +240,7 @@ def evaluate(
 
     # Load data
     labels: dict[str, list[str]] = json.loads(labels_path.read_text())
-    meta_by_file: dict[str, dict] = {}
-    with open(meta_path) as f:
-        for line in f:
-            if line.strip():
-                entry = json.loads(line)
-                meta_by_file[entry["filename"]] = entry
+    meta_by_file = load_meta(meta_path)
 
     # Parse activity pseudo-labels from descriptions
     activity_labels = parse_activity_labels(labels, meta_by_file)
@@ -208,10 +249,7 @@ def evaluate(
     print(f"[eval] Labels: {len(labels)} frames, Meta: {len(meta_by_file)} frames")
 
     # Show activity distribution
-    act_counts: dict[str, int] = defaultdict(int)
-    for acts in activity_labels.values():
-        for act in acts.values():
-            act_counts[act] += 1
+    act_counts = Counter(act for acts in activity_labels.values() for act in acts.values())
     print(f"[eval] Activity labels: {dict(act_counts)}")
 
     # Step 1: Select reference photos
@@ -225,11 +263,12 @@ def evaluate(
             ts = meta_by_file.get(fn, {}).get("timestamp", "?")[:19]
             print(f"  {cat}: {fn} ({ts})")
 
-    # Step 2: Determine test set (labeled frames minus refs)
+    # Step 2: Determine test set (labeled frames minus refs that exist on disk)
+    existing = list_frame_files(date_dir)
     test_frames = [
         (fname, cats)
         for fname, cats in labels.items()
-        if fname not in ref_filenames and (date_dir / fname).exists()
+        if fname not in ref_filenames and fname in existing
     ]
     # Sort by filename for deterministic order
     test_frames.sort(key=lambda x: x[0])
@@ -242,13 +281,10 @@ def evaluate(
     if dry_run:
         print("[eval] Dry run — skipping API calls")
         # Show test set distribution
-        cat_dist: dict[str, int] = defaultdict(int)
-        test_act_dist: dict[str, int] = defaultdict(int)
-        for fname, cats in test_frames:
-            for c in cats:
-                cat_dist[c] += 1
-            for act in activity_labels.get(fname, {}).values():
-                test_act_dist[act] += 1
+        cat_dist = Counter(c for _, cats in test_frames for c in cats)
+        test_act_dist = Counter(
+            act for fname, _ in test_frames for act in activity_labels.get(fname, {}).values()
+        )
         print(f"[eval] Test set cat distribution: {dict(cat_dist)}")
         print(f"[eval] Test set activity distribution: {dict(test_act_dist)}")
         return
@@ -258,83 +294,99 @@ def evaluate(
     for cat, filenames in refs.items():
         ref_images[cat] = []
         for fn in filenames:
-            img_path = date_dir / fn
-            if img_path.exists():
-                ref_images[cat].append(img_path.read_bytes())
+            if fn in existing:
+                ref_images[cat].append((date_dir / fn).read_bytes())
             else:
                 print(f"  WARNING: ref image missing: {fn}")
 
-    # Init Gemini client
-    api_key = _load_api_key()
-    client = genai.Client(api_key=api_key)
+    cfg = get_inference_settings()
+    print(f"[eval] Worker inference: roi={cfg.frame_roi}, max_edge={cfg.infer_max_edge}")
+    analyzer = CatAnalyzer(
+        api_key=_load_api_key(),
+        model=model,
+        ref_images=ref_images,
+        ref_max_edge=cfg.infer_max_edge if ref_max_edge is None else ref_max_edge,
+    )
 
-    # Step 3: Run evaluation
+    # Step 3: Run evaluation. Frames are read only when their request is
+    # sent; results are scored, printed and appended to eval_results.jsonl
+    # (for diffing runs later) in completion order, so an interrupted run
+    # keeps everything scored so far.
     results: list[dict] = []
     errors = 0
+    truth_by_file = dict(test_frames)
+    results_path = date_dir / "eval_results.jsonl"
 
-    for i, (fname, truth_cats) in enumerate(test_frames):
-        img_path = date_dir / fname
-        test_bytes = img_path.read_bytes()
-
-        try:
-            prompt = build_identify_prompt(ref_images, test_bytes)
-            response = client.models.generate_content(
-                model=model,
-                contents=prompt,
-                config=types.GenerateContentConfig(
-                    response_mime_type="application/json",
-                    response_schema=IdentifyResult,
-                    temperature=0.1,
-                ),
-            )
-            result = IdentifyResult.model_validate_json(response.text)
-
-            # Extract cat names and activities from structured response
-            pred_names = {ca.name for ca in result.cats}
-            pred_activities = {ca.name: ca.activity.value for ca in result.cats}
-            truth_set = set(truth_cats)
-            truth_activities = activity_labels.get(fname, {})
-            match = pred_names == truth_set
-
-            tag = "OK" if match else "XX"
-            results.append({
-                "filename": fname,
-                "truth": sorted(truth_set),
-                "pred": sorted(pred_names),
-                "match": match,
-                "confidence": result.confidence,
-                "truth_activities": truth_activities,
-                "pred_activities": pred_activities,
-            })
-
-            truth_str = ",".join(sorted(truth_set))
-            pred_str = ",".join(sorted(pred_names)) or "(none)"
-            # Show activity for correctly identified cats
-            act_detail = ""
-            for cat in sorted(pred_names & truth_set):
-                ta = truth_activities.get(cat, "?")
-                pa = pred_activities.get(cat, "?")
-                act_tag = "=" if ta == pa else "!"
-                act_detail += f" {cat}:{pa}({act_tag})"
-            print(
-                f"  [{i+1}/{len(test_frames)}] {tag} {fname}  "
-                f"truth=[{truth_str}] pred=[{pred_str}] "
-                f"conf={result.confidence:.0%}{act_detail}"
-            )
-
-        except Exception as exc:
-            errors += 1
-            print(f"  [{i+1}/{len(test_frames)}] ERR {fname}: {exc}")
-            continue
+    def _read(fname: str) -> bytes:
+        data = (date_dir / fname).read_bytes()
+        return prepare_inference_jpeg(data, cfg.frame_roi, cfg.infer_max_edge)
 
-        # Rate limit
-        time.sleep(0.3)
+    def _record(fname: str, result: IdentifyResult | Exception) -> None:
+        nonlocal errors
+        i = len(results) + errors
+        if isinstance(result, Exception):
+            errors += 1
+            print(f"  [{i+1}/{len(test_frames)}] ERR {fname}: {result}")
+            return
+        row = _score_result(fname, truth_by_file[fname], result, activity_labels.get(fname, {}))
+        results.append(row)
+        out.write(json.dumps(row, ensure_ascii=False) + "\n")
+        out.flush()
+        _print_result(i, len(test_frames), row)
+
+    async def _run() -> None:
+        async for fname, result in analyzer.analyze(
+            list(truth_by_file), _read, mode=mode, concurrency=concurrency
+        ):
+            _record(fname, result)
+
+    with open(results_path, "w") as out:
+        asyncio.run(_run())
+    print(f"[eval] Wrote {len(results)} results to {results_path}")
 
     # Step 4: Print summary
     _print_id_summary(results, errors)
     _print_activity_summary(results)
 
 
+def _score_result(
+    fname: str,
+    truth_cats: list[str],
+    result: IdentifyResult,
+    truth_activities: dict[str, str],
+) -> dict:
+    """Compare one structured Gemini response against the frame's labels."""
+    pred_names = {ca.name for ca in result.cats}
+    truth_set = set(truth_cats)
+    return {
+        "filename": fname,
+        "truth": sorted(truth_set),
+        "pred": sorted(pred_names),
+        "match": pred_names == truth_set,
+        "confidence": result.confidence,
+        "truth_activities": truth_activities,
+        "pred_activities": {ca.name: ca.activity.value for ca in result.cats},
+    }
+
+
+def _print_result(i: int, total: int, r: dict) -> None:
+    """Print one evaluated frame, with activity for correctly identified cats."""
+    tag = "OK" if r["match"] else "XX"
+    truth_str = ",".join(r["truth"])
+    pred_str = ",".join(r["pred"]) or "(none)"
+    act_detail = ""
+    for cat in sorted(set(r["pred"]) & set(r["truth"])):
+        ta = r["truth_activities"].get(cat, "?")
+        pa = r["pred_activities"].get(cat, "?")
+        act_tag = "=" if ta == pa else "!"
+        act_detail += f" {cat}:{pa}({act_tag})"
+    print(
+        f"  [{i+1}/{total}] {tag} {r['filename']}  "
+        f"truth=[{truth_str}] pred=[{pred_str}] "
+        f"conf={r['confidence']:.0%}{act_detail}"
+    )
+
+
 def _print_id_summary(results: list[dict], errors: int) -> None:
     """Print cat identification summary with per-cat precision/recall."""
     if not results:
@@ -352,20 +404,16 @@ def _print_id_summary(results: list[dict], errors: int) -> None:
     # TP: predicted AND in truth
     # FP: predicted but NOT in truth
     # FN: in truth but NOT predicted
-    tp: dict[str, int] = defaultdict(int)
-    fp: dict[str, int] = defaultdict(int)
-    fn: dict[str, int] = defaultdict(int)
+    tp: Counter[str] = Counter()
+    fp: Counter[str] = Counter()
+    fn: Counter[str] = Counter()
 
     for r in results:
         truth = set(r["truth"])
         pred = set(r["pred"])
-        for cat in truth | pred:
-            if cat in truth and cat in pred:
-                tp[cat] += 1
-            elif cat in pred and cat not in truth:
-                fp[cat] += 1
-            elif cat in truth and cat not in pred:
-                fn[cat] += 1
+        tp.update(truth & pred)
+        fp.update(pred - truth)
+        fn.update(truth - pred)
 
     print(f"\n{'Cat':<8} {'Prec':>6} {'Recall':>6} {'F1':>6} {'TP':>4} {'FP':>4} {'FN':>4}")
     print("-" * 46)
@@ -376,27 +424,27 @@ def _print_id_summary(results: list[dict], errors: int) -> None:
         print(f"{cat:<8} {p:>5.0%} {r:>6.0%} {f1:>6.0%} {tp[cat]:>4} {fp[cat]:>4} {fn[cat]:>4}")
 
     # Confusion pairs: most common (truth, pred) mismatches
-    confusion: dict[tuple[str, str], int] = defaultdict(int)
+    confusion: Counter[tuple[str, str]] = Counter()
     for r in results:
         if not r["match"]:
             truth = set(r["truth"])
             pred = set(r["pred"])
             missed = truth - pred
             extra = pred - truth
-            for m in missed:
-                for e in extra:
+            if missed and extra:
+                for m, e in product(missed, extra):
                     confusion[(m, e)] += 1
-            # Also track missed without replacement
-            for m in missed:
-                if not extra:
+            # Also track missed without replacement, and extras with nothing missed
+            elif missed:
+                for m in missed:
                     confusion[(m, "(missed)")] += 1
-            for e in extra:
-                if not missed:
+            else:
+                for e in extra:
                     confusion[("(none)", e)] += 1
 
     if confusion:
         print(f"\n[eval] Top confusion pairs (truth -> pred):")
-        for (t, p), count in sorted(confusion.items(), key=lambda x: -x[1])[:10]:
+        for (t, p), count in confusion.most_common(10):
             print(f"  {t} -> {p}: {count}x")
 
 
@@ -435,15 +483,9 @@ def _print_activity_summary(results: list[dict]) -> None:
     print(f"[eval] ACTIVITY: {correct}/{total} correct ({correct/total:.1%})")
 
     # Per-activity precision/recall
-    tp: dict[str, int] = defaultdict(int)
-    fp: dict[str, int] = defaultdict(int)
-    fn: dict[str, int] = defaultdict(int)
-    for t, p in pairs:
-        if t == p:
-            tp[t] += 1
-        else:
-            fp[p] += 1
-            fn[t] += 1
+    tp = Counter(t for t, p in pairs if t == p)
+    fp = Counter(p for t, p in pairs if t != p)
+    fn = Counter(t for t, p in pairs if t != p)
 
     print(f"\n{'Activity':<10} {'Prec':>6} {'Recall':>6} {'F1':>6} {'TP':>4} {'FP':>4} {'FN':>4}")
     print("-" * 50)
@@ -454,7 +496,7 @@ def _print_activity_summary(results: list[dict]) -> None:
         print(f"{act:<10} {p:>5.0%} {r:>6.0%} {f1:>6.0%} {tp[act]:>4} {fp[act]:>4} {fn[act]:>4}")
 
     # Confusion matrix
-    matrix: dict[str, dict[str, int]] = {a: defaultdict(int) for a in activity_types}
+    matrix: dict[str, Counter[str]] = {a: Counter() for a in activity_types}
     for t, p in pairs:
         if t in matrix:
             matrix[t][p] += 1
@@ -476,8 +518,18 @@ def main() -> None:
     parser.add_argument("--limit", type=int, default=0, help="Max test frames (0=all)")
     parser.add_argument("--model", default="gemini-2.5-flash", help="Gemini model")
     parser.add_argument("--dry-run", action="store_true", help="Show refs, skip API calls")
+    parser.add_argument("--mode", choices=["live", "batch"], default="live",
+                        help="live = real-time API, batch = Gemini Batch API (slow, cheaper)")
+    parser.add_argument("--concurrency", type=int, default=8, help="Max in-flight Gemini calls")
+    parser.add_argument(
+        "--ref-max-edge", type=int, default=None,
+        help="Downscale refs to this longest edge, 0=original (default: infer_max_edge setting)",
+    )
     args = parser.parse_args()
-    evaluate(args.date, args.output, args.limit, args.dry_run, args.model)
+    evaluate(
+        args.date, args.output, args.limit, args.dry_run, args.model,
+        mode=args.mode, concurrency=args.concurrency, ref_max_edge=args.ref_max_edge,
+    )
 
 
 if __name__ == "__main__":
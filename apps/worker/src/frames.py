@@ -0,0 +1,19 @@
+"""Helpers for the collected-frame date directories (data/<date>/).
+
+Kept free of capture/OpenCV imports so the offline tools (label, replay,
+eval) can use them without pulling in the RTMP pipeline.
+"""
+
+from __future__ import annotations
+
+import os
+from pathlib import Path
+
+
+def list_frame_files(date_dir: Path) -> frozenset[str]:
+    """Names of the files in a date directory, from one listing.
+
+    Lets callers check which frames exist without a stat() per frame.
+    """
+    with os.scandir(date_dir) as it:
+        return frozenset(e.name for e in it if e.is_file())
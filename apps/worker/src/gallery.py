@@ -10,26 +10,39 @@ from __future__ import annotations
 
 import argparse
 import json
+import os
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 import cv2
 import numpy as np
 
+from .collect import MOTION_DOWNSCALE, compute_motion_score
+
 
 THUMB_WIDTH = 220
 THUMB_HEIGHT = 124
 MOTION_THRESHOLD = 5000
 
+# libjpeg scales by 1/4 during the DCT, so the decode yields the motion-frame
+# size directly (~5x faster than a full decode followed by a resize)
+_REDUCED_DECODE = {2: cv2.IMREAD_REDUCED_COLOR_2, 4: cv2.IMREAD_REDUCED_COLOR_4,
+                   8: cv2.IMREAD_REDUCED_COLOR_8}[MOTION_DOWNSCALE]
+
+
+def _process_frame(jpg: Path, thumb_dir: Path) -> np.ndarray | None:
+    """Write the thumbnail for one frame and return its motion frame (None if unreadable).
 
-def compute_motion(current: np.ndarray, previous: np.ndarray | None) -> int:
-    """Simple frame-diff motion score."""
-    if previous is None:
-        return 0
-    diff = cv2.absdiff(current, previous)
-    gray = cv2.cvtColor(diff, cv2.COLOR_BGR2GRAY)
-    _, thresh = cv2.threshold(gray, 25, 255, cv2.THRESH_BINARY)
-    return int(cv2.countNonZero(thresh))
+    The frame is only ever decoded at motion-frame scale; the thumbnail is
+    smaller than that, so nothing needs the full-resolution pixels.
+    """
+    small = cv2.imread(str(jpg), _REDUCED_DECODE)
+    if small is None:
+        return None
+    thumb = cv2.resize(small, (THUMB_WIDTH, THUMB_HEIGHT), interpolation=cv2.INTER_AREA)
+    cv2.imwrite(str(thumb_dir / jpg.name), thumb, [cv2.IMWRITE_JPEG_QUALITY, 70])
+    return cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
 
 
 def generate_gallery(data_dir: str) -> None:
@@ -52,34 +65,34 @@ def generate_gallery(data_dir: str) -> None:
 
     # Compute motion scores and generate thumbnails
     entries: list[dict] = []
-    prev_frame: np.ndarray | None = None
+    prev_small: np.ndarray | None = None
     motion_count = 0
 
-    for i, jpg in enumerate(jpgs):
-        frame = cv2.imread(str(jpg))
-        if frame is None:
-            continue
+    # Decode + thumbnail in parallel (OpenCV releases the GIL); only the
+    # small gray frames come back for the order-dependent motion pass
+    with ThreadPoolExecutor(max_workers=os.cpu_count()) as pool:
+        smalls = pool.map(lambda jpg: _process_frame(jpg, thumb_dir), jpgs)
 
-        motion = compute_motion(frame, prev_frame)
-        prev_frame = frame.copy()
-        has_motion = motion > MOTION_THRESHOLD
+        for i, (jpg, small) in enumerate(zip(jpgs, smalls)):
+            if small is None:
+                continue
 
-        if has_motion:
-            motion_count += 1
+            # Same downscaled gray diff as collect, so scores are comparable
+            motion = compute_motion_score(small, prev_small)
+            prev_small = small
+            has_motion = motion > MOTION_THRESHOLD
 
-        # Generate thumbnail
-        thumb = cv2.resize(frame, (THUMB_WIDTH, THUMB_HEIGHT))
-        thumb_path = thumb_dir / jpg.name
-        cv2.imwrite(str(thumb_path), thumb, [cv2.IMWRITE_JPEG_QUALITY, 70])
+            if has_motion:
+                motion_count += 1
 
-        entries.append({
-            "filename": jpg.name,
-            "motion": motion,
-            "has_motion": has_motion,
-        })
+            entries.append({
+                "filename": jpg.name,
+                "motion": motion,
+                "has_motion": has_motion,
+            })
 
-        if (i + 1) % 100 == 0:
-            print(f"[gallery] {i + 1}/{len(jpgs)} processed")
+            if (i + 1) % 100 == 0:
+                print(f"[gallery] {i + 1}/{len(jpgs)} processed")
 
     # Write metadata
     meta_path = src / "gallery_meta.json"
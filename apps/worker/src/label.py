@@ -10,10 +10,10 @@ Usage:
 from __future__ import annotations
 
 import argparse
+import asyncio
 import json
 import os
 import sys
-import time
 from pathlib import Path
 from typing import Optional
 
@@ -21,6 +21,9 @@ from google import genai
 from google.genai import types
 from pydantic import BaseModel, Field
 
+from .analyzer import call_with_retry, get_client
+from .frames import list_frame_files
+
 
 # --- Structured output schema ---
 
@@ -32,6 +35,12 @@ class FrameLabel(BaseModel):
     confidence: float = Field(0.0, ge=0.0, le=1.0, description="Detection confidence")
 
 
+_LABEL_VALIDATOR = FrameLabel.__pydantic_validator__
+
+# FrameLabel fields merged into gallery_meta entries
+_LABEL_FIELDS = tuple(FrameLabel.model_fields)
+
+
 # --- Constants ---
 
 _PROJECT_ROOT = Path(__file__).resolve().parents[3]
@@ -59,21 +68,31 @@ def _load_api_key() -> str:
     sys.exit(1)
 
 
-def label_frame(client: genai.Client, model: str, image_bytes: bytes) -> FrameLabel:
-    """Send a single frame to Gemini for cat detection."""
-    response = client.models.generate_content(
-        model=model,
-        contents=[
-            _PROMPT,
-            types.Part.from_bytes(data=image_bytes, mime_type="image/jpeg"),
-        ],
-        config=types.GenerateContentConfig(
-            response_mime_type="application/json",
-            response_schema=FrameLabel,
-            temperature=0.1,
-        ),
-    )
-    return FrameLabel.model_validate_json(response.text)
+_LABEL_CONFIG = types.GenerateContentConfig(
+    response_mime_type="application/json",
+    response_schema=FrameLabel,
+    temperature=0.1,
+)
+
+
+def _label_request(model: str, image_bytes: bytes) -> dict:
+    """Build generate_content kwargs for labeling one frame."""
+    return {
+        "model": model,
+        "contents": [_PROMPT, types.Part.from_bytes(data=image_bytes, mime_type="image/jpeg")],
+        "config": _LABEL_CONFIG,
+    }
+
+
+async def label_frame_async(client: genai.Client, model: str, image_bytes: bytes) -> FrameLabel:
+    """Send a single frame to Gemini for cat detection, with backoff on 429/5xx/timeouts."""
+    request = _label_request(model, image_bytes)
+
+    async def _call() -> FrameLabel:
+        response = await client.aio.models.generate_content(**request)
+        return _LABEL_VALIDATOR.validate_json(response.text)
+
+    return await call_with_retry(_call, tag="label")
 
 
 def run_labeling(
@@ -83,10 +102,17 @@ def run_labeling(
     dry_run: bool = False,
     model: str = "gemini-2.5-flash",
     min_score: int = 5000,
+    concurrency: int = 8,
 ) -> None:
-    """Label motion frames in a date directory with cat detection."""
+    """Label motion frames in a date directory with cat detection.
+
+    Up to `concurrency` Gemini calls run at once. Each result is appended to
+    label_updates.jsonl as it completes, and folded into gallery_meta.jsonl
+    once at the end (or at the start of the next run, after a crash).
+    """
     date_dir = Path(output_dir) / date
     meta_path = date_dir / "gallery_meta.jsonl"
+    updates_path = date_dir / "label_updates.jsonl"
 
     if not meta_path.exists():
         print(f"[label] Error: {meta_path} not found")
@@ -100,6 +126,14 @@ def run_labeling(
             if line:
                 entries.append(json.loads(line))
 
+    # Recover labels from an interrupted run and compact them into the meta
+    recovered = _apply_updates(entries, updates_path)
+    if recovered:
+        print(f"[label] Recovered {recovered} labels from {updates_path.name}")
+        if not dry_run:
+            _write_meta(meta_path, entries)
+            updates_path.unlink()
+
     # Find unlabeled frames above the motion score threshold
     # Use motion_score directly rather than has_motion (which may have been written with an old threshold)
     to_label = [
@@ -128,57 +162,86 @@ def run_labeling(
 
     # Init Gemini client
     api_key = _load_api_key()
-    client = genai.Client(api_key=api_key)
-
-    cat_count = 0
-    error_count = 0
-
-    for i, entry in enumerate(to_label):
-        img_path = date_dir / entry["filename"]
-        if not img_path.exists():
-            print(f"  [{i+1}/{len(to_label)}] SKIP {entry['filename']} (file missing)")
-            continue
-
-        try:
-            img_bytes = img_path.read_bytes()
-            result = label_frame(client, model, img_bytes)
-
-            # Merge label fields into entry (modifies the dict in `entries` list)
-            entry["cat_detected"] = result.cat_detected
-            entry["cat_count"] = result.cat_count
-            entry["cat_description"] = result.cat_description
-            entry["confidence"] = result.confidence
-
-            tag = "CAT" if result.cat_detected else "---"
-            if result.cat_detected:
-                cat_count += 1
-
-            print(
-                f"  [{i+1}/{len(to_label)}] {tag} {entry['filename']} "
-                f"conf={result.confidence:.0%}"
-                + (f" ({result.cat_description})" if result.cat_description else "")
-            )
-
-        except Exception as exc:
-            error_count += 1
-            print(f"  [{i+1}/{len(to_label)}] ERR {entry['filename']}: {exc}")
-            # Continue with next frame instead of crashing
-            continue
-
-        # Write back after every frame so progress is saved on crash
-        if (i + 1) % 10 == 0 or i == len(to_label) - 1:
-            _write_meta(meta_path, entries)
-
-        # Small delay to respect rate limits
-        time.sleep(0.15)
-
-    # Final write
+    client = get_client(api_key)
+
+    existing = list_frame_files(date_dir)
+    frames: list[dict] = []
+    for entry in to_label:
+        if entry["filename"] in existing:
+            frames.append(entry)
+        else:
+            print(f"  SKIP {entry['filename']} (file missing)")
+
+    async def _one(entry: dict, sem: asyncio.Semaphore) -> tuple[dict, FrameLabel | Exception]:
+        async with sem:
+            try:
+                img_bytes = (date_dir / entry["filename"]).read_bytes()
+                return entry, await label_frame_async(client, model, img_bytes)
+            except Exception as exc:
+                return entry, exc
+
+    async def _label_all() -> tuple[int, int]:
+        sem = asyncio.Semaphore(concurrency)
+        cat_count = 0
+        error_count = 0
+        pending = [_one(e, sem) for e in frames]
+        with open(updates_path, "a") as updates:
+            for i, fut in enumerate(asyncio.as_completed(pending)):
+                entry, result = await fut
+                if isinstance(result, Exception):
+                    error_count += 1
+                    print(f"  [{i+1}/{len(frames)}] ERR {entry['filename']}: {result}")
+                    continue
+
+                # Merge label fields into entry (modifies the dict in `entries` list)
+                label = {field: getattr(result, field) for field in _LABEL_FIELDS}
+                entry.update(label)
+
+                # Append just this label so progress survives a crash without
+                # rewriting the whole meta file
+                updates.write(json.dumps({"filename": entry["filename"], **label}) + "\n")
+                updates.flush()
+
+                tag = "CAT" if result.cat_detected else "---"
+                if result.cat_detected:
+                    cat_count += 1
+
+                print(
+                    f"  [{i+1}/{len(frames)}] {tag} {entry['filename']} "
+                    f"conf={result.confidence:.0%}"
+                    + (f" ({result.cat_description})" if result.cat_description else "")
+                )
+        return cat_count, error_count
+
+    cat_count, error_count = asyncio.run(_label_all())
+
+    # Compact: one full rewrite, then the updates are redundant
     _write_meta(meta_path, entries)
+    updates_path.unlink(missing_ok=True)
 
     print(f"\n[label] Done! {cat_count} cats detected in {len(to_label)} frames "
           f"({error_count} errors)")
 
 
+def _apply_updates(entries: list[dict], updates_path: Path) -> int:
+    """Merge labels appended by an earlier run into entries; returns how many applied."""
+    if not updates_path.exists():
+        return 0
+    by_name = {e["filename"]: e for e in entries}
+    applied = 0
+    with open(updates_path) as f:
+        for line in f:
+            try:
+                update = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # torn last line from a crash mid-write
+            entry = by_name.get(update.pop("filename", None))
+            if entry is not None:
+                entry.update(update)
+                applied += 1
+    return applied
+
+
 def _write_meta(path: Path, entries: list[dict]) -> None:
     """Write entries back to JSONL file atomically."""
     tmp = path.with_suffix(".jsonl.tmp")
@@ -197,8 +260,12 @@ def main() -> None:
                         help="Min motion score to label (default: 5000)")
     parser.add_argument("--model", default="gemini-2.5-flash", help="Gemini model to use")
     parser.add_argument("--dry-run", action="store_true", help="Preview without API calls")
+    parser.add_argument("--concurrency", type=int, default=8, help="Max in-flight Gemini calls")
     args = parser.parse_args()
-    run_labeling(args.date, args.output, args.limit, args.dry_run, args.model, args.min_score)
+    run_labeling(
+        args.date, args.output, args.limit, args.dry_run, args.model, args.min_score,
+        concurrency=args.concurrency,
+    )
 
 
 if __name__ == "__main__":
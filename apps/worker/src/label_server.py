@@ -16,14 +16,44 @@ from __future__ import annotations
 
 import http.server
 import json
+import threading
 from pathlib import Path
 from urllib.parse import urlparse
 
 DATA_DIR = Path(__file__).resolve().parents[1] / "data"
 PORT = 8901
 
+# Parsed labels.json per file, keyed by (mtime_ns, size) so edits made
+# outside the server are still picked up. Cached dicts are never mutated.
+_LABEL_CACHE: dict[Path, tuple[tuple[int, int], dict[str, list[str]]]] = {}
+_LABEL_LOCK = threading.Lock()
+
+
+def _file_key(path: Path) -> tuple[int, int] | None:
+    try:
+        st = path.stat()
+    except FileNotFoundError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def _load_labels(labels_file: Path) -> dict[str, list[str]]:
+    """Return the labels for a date, re-parsing only when the file changed."""
+    key = _file_key(labels_file)
+    if key is None:
+        return {}
+    cached = _LABEL_CACHE.get(labels_file)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+    labels = json.loads(labels_file.read_text())
+    _LABEL_CACHE[labels_file] = (key, labels)
+    return labels
+
 
 class LabelHandler(http.server.BaseHTTPRequestHandler):
+    # Keep-alive: the gallery fetches and posts many labels per session.
+    # Every response carries Content-Length (send_error closes instead).
+    protocol_version = "HTTP/1.1"
 
     def do_GET(self) -> None:
         path = urlparse(self.path).path.strip("/")
@@ -32,8 +62,8 @@ class LabelHandler(http.server.BaseHTTPRequestHandler):
         # GET /labels/{date}
         if len(parts) == 2 and parts[0] == "labels":
             date = parts[1]
-            labels_file = DATA_DIR / date / "labels.json"
-            data = json.loads(labels_file.read_text()) if labels_file.exists() else {}
+            with _LABEL_LOCK:
+                data = _load_labels(DATA_DIR / date / "labels.json")
             self._json_response(data)
         else:
             self.send_error(404)
@@ -55,18 +85,18 @@ class LabelHandler(http.server.BaseHTTPRequestHandler):
 
         labels_file = DATA_DIR / date / "labels.json"
 
-        # Load existing labels
-        labels: dict[str, list[str]] = {}
-        if labels_file.exists():
-            labels = json.loads(labels_file.read_text())
+        with _LABEL_LOCK:
+            # Copy so a GET still serializing the cached dict isn't disturbed
+            labels = dict(_load_labels(labels_file))
 
-        # Update: empty list means "no cat" (explicit), missing means unlabeled
-        labels[filename] = cats
+            # Update: empty list means "no cat" (explicit), missing means unlabeled
+            labels[filename] = cats
 
-        # Atomic write
-        tmp = labels_file.with_suffix(".json.tmp")
-        tmp.write_text(json.dumps(labels, ensure_ascii=False, indent=2))
-        tmp.replace(labels_file)
+            # Atomic write
+            tmp = labels_file.with_suffix(".json.tmp")
+            tmp.write_text(json.dumps(labels, ensure_ascii=False, indent=2))
+            tmp.replace(labels_file)
+            _LABEL_CACHE[labels_file] = (_file_key(labels_file), labels)
 
         self._json_response({"ok": True, "total": len(labels)})
 
@@ -83,7 +113,7 @@ class LabelHandler(http.server.BaseHTTPRequestHandler):
 
 
 def main() -> None:
-    server = http.server.HTTPServer(("127.0.0.1", PORT), LabelHandler)
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", PORT), LabelHandler)
     print(f"[label-server] Listening on 127.0.0.1:{PORT}")
     print(f"[label-server] Data dir: {DATA_DIR}")
     server.serve_forever()
@@ -3,25 +3,37 @@
 from __future__ import annotations
 
 import time
+from dataclasses import dataclass
 from datetime import datetime, timezone
 from pathlib import Path
 
-import cv2
 import numpy as np
 
-from .analyzer import CatAnalyzer
-from .capture import capture_frames
-from .collect import compute_motion_score
+from .analyzer import CatAnalyzer, encode_frame_jpeg, prepare_inference_frame
+from .capture import prefetch_frames
+from .collect import compute_motion_score, motion_frame
 from .config import get_settings
 from .notifier import LarkNotifier
 from .storage import PurrviewStorage
 from .tracker import FeedingSession, SessionTracker
 
 
-def encode_frame_jpeg(frame: np.ndarray, quality: int = 85) -> bytes:
-    """Encode a BGR frame to JPEG bytes."""
-    _, buf = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, quality])
-    return buf.tobytes()
+# Seconds between gate statistics log lines
+STATS_INTERVAL = 600
+
+
+@dataclass
+class GateStats:
+    """Frames seen vs. frames that passed the motion and cooldown gates."""
+    frames: int = 0
+    motion: int = 0
+    gemini: int = 0
+
+    def summary(self) -> str:
+        return (
+            f"{self.frames} frames, {self.motion} over motion threshold, "
+            f"{self.gemini} Gemini calls ({self.frames - self.gemini} skipped)"
+        )
 
 
 def _upload_first_frame(session: FeedingSession, storage: PurrviewStorage, event_id: str) -> str | None:
@@ -78,6 +90,7 @@ def run() -> None:
         api_key=cfg.gemini_api_key,
         refs_dir=Path(cfg.refs_dir),
         model=cfg.gemini_model,
+        ref_max_edge=cfg.infer_max_edge,
     )
     notifier = LarkNotifier()
     tracker = SessionTracker(idle_timeout=cfg.idle_timeout)
@@ -92,25 +105,37 @@ def run() -> None:
         f"cooldown={cfg.motion_cooldown}s, idle_timeout={cfg.idle_timeout}s"
     )
 
-    prev_frame: np.ndarray | None = None
+    prev_small: np.ndarray | None = None
     last_gemini_call: float = 0
+    stats = GateStats()
+    stats_since = time.time()
 
-    for frame in capture_frames(cfg.rtmp_url):
+    # Read the stream on a background thread so Gemini calls don't stall capture
+    for frame in prefetch_frames(cfg.rtmp_url):
         now = time.time()
+        stats.frames += 1
 
         # 1. Simple frame-diff motion detection
-        motion_score = compute_motion_score(frame, prev_frame)
-        prev_frame = frame.copy()
+        small = motion_frame(frame)
+        motion_score = compute_motion_score(small, prev_small)
+        prev_small = small
 
         if motion_score > cfg.motion_threshold:
+            stats.motion += 1
             # 2. Gemini cooldown check
             if (now - last_gemini_call) >= cfg.motion_cooldown:
                 last_gemini_call = now
-                frame_bytes = encode_frame_jpeg(frame)
+                stats.gemini += 1
+                infer_bytes = encode_frame_jpeg(
+                    prepare_inference_frame(frame, cfg.frame_roi, cfg.infer_max_edge)
+                )
 
                 try:
-                    result = analyzer.analyze_frame(frame_bytes)
+                    result = analyzer.analyze_frame(infer_bytes)
                     if result.cats_present:
+                        # Full-resolution JPEG is only stored for frames with
+                        # cats; `frame` stays valid until the next iteration
+                        frame_bytes = encode_frame_jpeg(frame)
                         frame_info = {"timestamp": now, "frame_bytes": frame_bytes, "motion_score": motion_score}
                         completed = tracker.on_analysis(result, now, frame_info)
                         for session in completed:
@@ -134,6 +159,11 @@ def run() -> None:
         for session in completed:
             _handle_completed(session, storage, notifier)
 
+        if now - stats_since >= STATS_INTERVAL:
+            print(f"[main] Last {STATS_INTERVAL // 60} min: {stats.summary()}")
+            stats = GateStats()
+            stats_since = now
+
 
 if __name__ == "__main__":
     run()
@@ -30,11 +30,18 @@ class LarkNotifier:
             self.webhook_url = webhook_url
         else:
             self.webhook_url = get_settings().lark_webhook_url
+        # One client per notifier so alerts reuse the keep-alive connection
+        # (and TLS session) to the webhook host instead of a fresh handshake
+        self._client = httpx.Client(timeout=10)
 
     @property
     def enabled(self) -> bool:
         return bool(self.webhook_url)
 
+    def close(self) -> None:
+        """Close the pooled HTTP connection(s)."""
+        self._client.close()
+
     def send_feeding_alert(
         self,
         session: FeedingSession,
@@ -229,7 +236,7 @@ class LarkNotifier:
     def _post_to_lark(self, payload: dict) -> bool:
         """POST a card payload to the Lark webhook. Returns True on success."""
         try:
-            resp = httpx.post(self.webhook_url, json=payload, timeout=10)
+            resp = self._client.post(self.webhook_url, json=payload)
             data = resp.json()
             if data.get("code") != 0:
                 print(f"[notifier] Lark API error: {data}")
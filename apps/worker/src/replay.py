@@ -9,13 +9,16 @@ Usage:
 from __future__ import annotations
 
 import argparse
+import asyncio
 import json
 import sys
-import time
 from datetime import datetime
 from pathlib import Path
+from typing import Literal
 
-from .analyzer import CatAnalyzer
+from .analyzer import CatAnalyzer, IdentifyResult, prepare_inference_jpeg
+from .config import get_inference_settings
+from .frames import list_frame_files
 from .label import _load_api_key
 from .notifier import LarkNotifier
 from .storage import PurrviewStorage
@@ -32,8 +35,14 @@ def replay(
     model: str = "gemini-2.5-flash",
     save: bool = False,
     notify: bool = False,
+    concurrency: int = 8,
+    mode: Literal["live", "batch"] = "live",
 ) -> None:
-    """Replay captured frames through analyzer + tracker."""
+    """Replay captured frames through analyzer + tracker.
+
+    mode="batch" submits all frames as one Gemini Batch API job (cheaper,
+    but may take hours); mode="live" calls the real-time endpoint.
+    """
     date_dir = Path(output_dir) / date
     meta_path = date_dir / "gallery_meta.jsonl"
 
@@ -59,7 +68,12 @@ def replay(
 
     # Init components
     api_key = _load_api_key()
-    analyzer = CatAnalyzer(api_key=api_key, refs_dir=Path(refs_dir), model=model)
+    # Frames and references get the worker's crop/downscale, so replay sees
+    # what production would send
+    cfg = get_inference_settings()
+    analyzer = CatAnalyzer(
+        api_key=api_key, refs_dir=Path(refs_dir), model=model, ref_max_edge=cfg.infer_max_edge
+    )
     tracker = SessionTracker(idle_timeout=idle_timeout)
     storage = PurrviewStorage() if save else None
     notifier = LarkNotifier() if notify else None
@@ -86,46 +100,76 @@ def replay(
         if notifier:
             notifier.send_feeding_alert(s)
 
+    # Cooldown depends only on frame timestamps, so the frames to analyze
+    # can be picked up front and sent to Gemini concurrently.
+    existing = list_frame_files(date_dir)
+    to_analyze: list[tuple[int, str, float]] = []
     for i, entry in enumerate(entries):
         fname = entry["filename"]
-        img_path = date_dir / fname
-        if not img_path.exists():
+        if fname not in existing:
             continue
 
         # Parse timestamp to unix seconds
         ts = datetime.fromisoformat(entry["timestamp"]).timestamp()
 
+        # Apply cooldown (based on frame timestamps)
+        if (ts - last_call_ts) < cooldown:
+            continue
+        last_call_ts = ts
+        to_analyze.append((i, fname, ts))
+
+    def _track(fname: str, ts: float, result: IdentifyResult | Exception) -> None:
+        """Feed one result to the tracker; must be called in timestamp order."""
         # Check idle before each frame (using frame timestamp, not wall clock)
         completed = tracker.check_idle(now=ts)
         all_completed.extend(completed)
         for s in completed:
             _on_session_complete(s, tag="END")
 
-        # Apply cooldown (based on frame timestamps)
-        if (ts - last_call_ts) < cooldown:
-            continue
-        last_call_ts = ts
-
-        # Analyze frame
-        frame_bytes = img_path.read_bytes()
-        try:
-            result = analyzer.analyze_frame(frame_bytes)
+        if isinstance(result, Exception):
+            return
+        completed = tracker.on_analysis(
+            result, timestamp=ts, frame_info={"filename": fname, "timestamp": ts}
+        )
+        all_completed.extend(completed)
+        for s in completed:
+            _on_session_complete(s, tag="SWITCH")
+
+    # Results are printed as they arrive, but the tracker needs them in
+    # timestamp order: early finishers wait until every earlier frame is in.
+    position = {fname: pos for pos, (_, fname, _) in enumerate(to_analyze)}
+    ready: dict[int, IdentifyResult | Exception] = {}
+    next_pos = 0
+
+    def _on_result(fname: str, result: IdentifyResult | Exception) -> None:
+        nonlocal errors, calls, next_pos
+        pos = position[fname]
+        i = to_analyze[pos][0]
+        if isinstance(result, Exception):
+            errors += 1
+            print(f"  [{i+1}/{len(entries)}] ERR {fname}: {result}")
+        else:
             calls += 1
             cats_str = ", ".join(f"{c.name}:{c.activity.value}" for c in result.cats) or "(none)"
             print(f"  [{i+1}/{len(entries)}] {fname} -> {cats_str}")
 
-            completed = tracker.on_analysis(
-                result, timestamp=ts, frame_info={"filename": fname, "timestamp": ts}
-            )
-            all_completed.extend(completed)
-            for s in completed:
-                _on_session_complete(s, tag="SWITCH")
+        ready[pos] = result
+        while next_pos in ready:
+            _, ready_fname, ts = to_analyze[next_pos]
+            _track(ready_fname, ts, ready.pop(next_pos))
+            next_pos += 1
 
-        except Exception as exc:
-            errors += 1
-            print(f"  [{i+1}/{len(entries)}] ERR {fname}: {exc}")
+    def _read(fname: str) -> bytes:
+        data = (date_dir / fname).read_bytes()
+        return prepare_inference_jpeg(data, cfg.frame_roi, cfg.infer_max_edge)
+
+    async def _run() -> None:
+        async for fname, result in analyzer.analyze(
+            list(position), _read, mode=mode, concurrency=concurrency
+        ):
+            _on_result(fname, result)
 
-        time.sleep(0.3)  # rate limit
+    asyncio.run(_run())
 
     # Flush remaining sessions
     final = tracker.check_idle(now=float("inf"))
@@ -166,11 +210,15 @@ def main() -> None:
     parser.add_argument("--model", default="gemini-2.5-flash", help="Gemini model")
     parser.add_argument("--save", action="store_true", help="Write sessions to Supabase")
     parser.add_argument("--notify", action="store_true", help="Send Lark notifications")
+    parser.add_argument("--concurrency", type=int, default=8, help="Max in-flight Gemini calls")
+    parser.add_argument("--mode", choices=["live", "batch"], default="live",
+                        help="live = real-time API, batch = Gemini Batch API (slow, cheaper)")
     args = parser.parse_args()
     replay(
         args.date, args.output, args.refs, args.limit,
         args.idle_timeout, args.cooldown, args.model,
-        save=args.save, notify=args.notify,
+        save=args.save, notify=args.notify, concurrency=args.concurrency,
+        mode=args.mode,
     )
 
 
@@ -1,11 +1,33 @@
 """Tests for analyzer module."""
 
+import asyncio
+import json
+import time
+from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import cv2
+import httpx
+import numpy as np
+import pytest
+from google.genai import errors
+from pydantic import ValidationError
+
 from src.analyzer import (
     Activity,
+    CatAnalyzer,
     CatActivity,
     IdentifyResult,
+    IDENTIFY_VALIDATOR,
     CAT_NAMES,
     CAT_DESCRIPTIONS,
+    MAX_ATTEMPTS,
+    PREFIX_CACHE_REFRESH_MARGIN,
+    PREFIX_CACHE_TTL,
+    build_identify_prompt,
+    build_reference_prefix,
+    call_with_retry,
+    prepare_inference_jpeg,
 )
 
 
@@ -33,6 +55,18 @@ class TestSchema:
         assert result.cats[0].name == "大吉"
         assert result.cats[0].activity == Activity.EATING
 
+    def test_result_is_frozen(self):
+        result = IdentifyResult(cats_present=True, confidence=0.5)
+        with pytest.raises(ValidationError):
+            result.confidence = 0.9
+
+    def test_validator_returns_model(self):
+        result = IDENTIFY_VALIDATOR.validate_json(
+            '{"cats_present": true, "cats": [{"name": "小黑", "activity": "drinking"}]}'
+        )
+        assert isinstance(result, IdentifyResult)
+        assert result.cats[0].activity == Activity.DRINKING
+
     def test_identify_result_empty_cats(self):
         result = IdentifyResult(cats_present=False, confidence=0.0)
         assert result.cats == []
@@ -43,3 +77,319 @@ class TestSchema:
     def test_cat_descriptions_match_names(self):
         for name in CAT_NAMES:
             assert name in CAT_DESCRIPTIONS
+
+
+class TestPrompt:
+    def test_identify_prompt_is_prefix_plus_suffix(self):
+        refs = {"大吉": [b"ref-a", b"ref-b"], "小黑": [b"ref-c"]}
+        prefix = build_reference_prefix(refs)
+        prompt = build_identify_prompt(refs, b"test")
+        assert len(prompt) == len(prefix) + 2
+        assert prompt[: len(prefix)][0] == prefix[0]
+        assert prompt[-1].inline_data.data == b"test"
+
+    def test_reference_parts_are_shared(self):
+        a = build_reference_prefix({"大吉": [b"same-ref"]})
+        b = build_reference_prefix({"大吉": [b"same-ref"]})
+        assert a[-1] is b[-1]
+
+    def test_prefix_skips_cats_without_refs(self):
+        prefix = build_reference_prefix({"大吉": [b"ref-a"]})
+        # rules text + one cat header + one image
+        assert len(prefix) == 3
+        assert "大吉" in prefix[1]
+
+
+def _make_analyzer() -> CatAnalyzer:
+    with patch("src.analyzer.get_client"), patch(
+        "src.analyzer.load_reference_images", return_value={"大吉": [b"ref"]}
+    ):
+        return CatAnalyzer(api_key="test", refs_dir=Path("refs"))
+
+
+def _response(cats_present: bool) -> MagicMock:
+    return MagicMock(text=json.dumps({"cats_present": cats_present, "cats": []}))
+
+
+class TestAnalyzerInit:
+    def test_preloaded_refs_skip_disk(self):
+        with patch("src.analyzer.get_client"), patch("src.analyzer.load_reference_images") as load:
+            analyzer = CatAnalyzer(api_key="test", ref_images={"小黑": [b"ref"]})
+        load.assert_not_called()
+        assert analyzer.ref_images == {"小黑": [b"ref"]}
+
+    def test_requires_refs(self):
+        with patch("src.analyzer.get_client"), pytest.raises(ValueError):
+            CatAnalyzer(api_key="test")
+
+    def test_refs_shrunk_like_inference_frames(self):
+        ref = cv2.imencode(".jpg", np.zeros((720, 1280, 3), dtype=np.uint8))[1].tobytes()
+        with patch("src.analyzer.get_client"):
+            analyzer = CatAnalyzer(api_key="test", ref_images={"小黑": [ref]}, ref_max_edge=640)
+        small = cv2.imdecode(np.frombuffer(analyzer.ref_images["小黑"][0], np.uint8), 1)
+        assert small.shape == (360, 640, 3)
+
+
+class TestPrepareInferenceJpeg:
+    def test_crops_and_shrinks(self):
+        data = cv2.imencode(".jpg", np.zeros((720, 1280, 3), dtype=np.uint8))[1].tobytes()
+        out = prepare_inference_jpeg(data, (0, 0, 1000, 500), 500)
+        assert cv2.imdecode(np.frombuffer(out, np.uint8), 1).shape == (250, 500, 3)
+
+    def test_small_image_returned_unchanged(self):
+        data = cv2.imencode(".jpg", np.zeros((100, 200, 3), dtype=np.uint8))[1].tobytes()
+        assert prepare_inference_jpeg(data, None, 768) is data
+
+    def test_undecodable_returned_unchanged(self):
+        assert prepare_inference_jpeg(b"not a jpeg", None, 768) == b"not a jpeg"
+
+
+class TestAnalyzeAsync:
+    def test_analyze_iter_yields_in_completion_order(self):
+        analyzer = _make_analyzer()
+
+        async def _generate(**request):
+            frame = request["contents"][-1].inline_data.data
+            await asyncio.sleep(0.05 if frame == b"slow" else 0)
+            return _response(frame == b"slow")
+
+        analyzer.client.aio.models.generate_content = _generate
+        loaded: list[str] = []
+
+        def _load(key: str) -> bytes:
+            loaded.append(key)
+            return key.encode()
+
+        async def _collect():
+            return [item async for item in analyzer.analyze_iter(["slow", "fast"], _load)]
+
+        results = asyncio.run(_collect())
+        assert [k for k, _ in results] == ["fast", "slow"]
+        assert results[1][1].cats_present is True
+        assert sorted(loaded) == ["fast", "slow"]
+
+    def test_analyze_iter_yields_load_errors(self):
+        analyzer = _make_analyzer()
+
+        def _load(key: str) -> bytes:
+            raise FileNotFoundError(key)
+
+        async def _collect():
+            return [item async for item in analyzer.analyze_iter(["gone.jpg"], _load)]
+
+        [(key, result)] = asyncio.run(_collect())
+        assert key == "gone.jpg"
+        assert isinstance(result, FileNotFoundError)
+
+    def test_retries_on_server_error(self):
+        analyzer = _make_analyzer()
+        analyzer.client.aio.models.generate_content = AsyncMock(
+            side_effect=[errors.ServerError(503, {}), _response(True)]
+        )
+        with patch("src.analyzer.asyncio.sleep", new=AsyncMock()):
+            result = asyncio.run(analyzer.analyze_frame_async(b"a"))
+        assert result.cats_present is True
+
+    def test_failed_frame_returns_exception(self):
+        analyzer = _make_analyzer()
+        analyzer.client.aio.models.generate_content = AsyncMock(
+            side_effect=errors.ClientError(400, {})
+        )
+
+        async def _collect():
+            return [item async for item in analyzer.analyze_iter(["a"], str.encode)]
+
+        [(_, result)] = asyncio.run(_collect())
+        assert isinstance(result, errors.ClientError)
+
+
+class TestCallWithRetry:
+    def test_gives_up_after_max_attempts(self):
+        fn = AsyncMock(side_effect=errors.ClientError(429, {}))
+        with patch("src.analyzer.asyncio.sleep", new=AsyncMock()):
+            with pytest.raises(errors.ClientError):
+                asyncio.run(call_with_retry(fn))
+        assert fn.await_count == MAX_ATTEMPTS
+
+    def test_non_retryable_raises_immediately(self):
+        fn = AsyncMock(side_effect=errors.ClientError(400, {}))
+        with pytest.raises(errors.ClientError):
+            asyncio.run(call_with_retry(fn))
+        assert fn.await_count == 1
+
+    @pytest.mark.parametrize(
+        "exc",
+        [httpx.ReadTimeout("read timed out"), httpx.ConnectError("connection refused")],
+    )
+    def test_retries_http_client_errors(self, exc):
+        fn = AsyncMock(side_effect=[exc, "ok"])
+        with patch("src.analyzer.asyncio.sleep", new=AsyncMock()):
+            assert asyncio.run(call_with_retry(fn)) == "ok"
+        assert fn.await_count == 2
+
+
+class TestPrefixCache:
+    def test_cached_calls_send_suffix_only(self):
+        analyzer = _make_analyzer()
+        analyzer.client.caches.create.return_value = MagicMock(name="cache")
+        analyzer.client.caches.create.return_value.name = "cachedContents/abc"
+        assert analyzer.cache_prefix()
+
+        request = analyzer._request(b"frame")
+        assert len(request["contents"]) == 2
+        assert request["config"].cached_content == "cachedContents/abc"
+
+        analyzer.release_cache()
+        analyzer.client.caches.delete.assert_called_once_with(name="cachedContents/abc")
+        request = analyzer._request(b"frame")
+        assert request["contents"][0] is analyzer._prompt_prefix[0]
+        assert request["config"].cached_content is None
+
+    def test_falls_back_when_cache_refused(self):
+        analyzer = _make_analyzer()
+        analyzer.client.caches.create.side_effect = errors.ClientError(
+            400, {"error": {"message": "too few tokens"}}
+        )
+        assert not analyzer.cache_prefix()
+        assert len(analyzer._request(b"frame")["contents"]) == len(analyzer._prompt_prefix) + 2
+
+    def _cached_analyzer(self, seconds_left: float) -> CatAnalyzer:
+        analyzer = _make_analyzer()
+        analyzer.client.caches.create.return_value.name = "cachedContents/abc"
+        assert analyzer.cache_prefix()
+        analyzer._cache_deadline = time.monotonic() + seconds_left
+        analyzer.client.aio.caches.update = AsyncMock()
+        analyzer.client.aio.caches.create = AsyncMock()
+        analyzer.client.aio.models.generate_content = AsyncMock(return_value=_response(False))
+        return analyzer
+
+    def test_fresh_cache_not_extended(self):
+        analyzer = self._cached_analyzer(seconds_left=3000)
+        asyncio.run(analyzer.analyze_frame_async(b"frame"))
+        analyzer.client.aio.caches.update.assert_not_awaited()
+
+    def test_extends_ttl_near_expiry(self):
+        analyzer = self._cached_analyzer(seconds_left=60)
+        asyncio.run(analyzer.analyze_frame_async(b"frame"))
+
+        update = analyzer.client.aio.caches.update.await_args.kwargs
+        assert update["name"] == "cachedContents/abc"
+        assert update["config"].ttl == PREFIX_CACHE_TTL
+        assert analyzer._cache_deadline > time.monotonic() + PREFIX_CACHE_REFRESH_MARGIN
+        request = analyzer.client.aio.models.generate_content.await_args.kwargs
+        assert request["config"].cached_content == "cachedContents/abc"
+
+    def test_recreates_when_extend_fails(self):
+        analyzer = self._cached_analyzer(seconds_left=60)
+        analyzer.client.aio.caches.update.side_effect = errors.ClientError(404, {})
+        analyzer.client.aio.caches.create.return_value = MagicMock()
+        analyzer.client.aio.caches.create.return_value.name = "cachedContents/new"
+
+        asyncio.run(analyzer.analyze_frame_async(b"frame"))
+
+        request = analyzer.client.aio.models.generate_content.await_args.kwargs
+        assert request["config"].cached_content == "cachedContents/new"
+
+    def test_expired_cache_falls_back_to_full_prompt(self):
+        analyzer = self._cached_analyzer(seconds_left=3000)
+        analyzer.client.aio.models.generate_content.side_effect = [
+            errors.ClientError(
+                404, {"error": {"message": "CachedContent not found", "status": "NOT_FOUND"}}
+            ),
+            _response(True),
+        ]
+
+        assert asyncio.run(analyzer.analyze_frame_async(b"frame")).cats_present
+
+        request = analyzer.client.aio.models.generate_content.await_args.kwargs
+        assert request["config"].cached_content is None
+        assert len(request["contents"]) == len(analyzer._prompt_prefix) + 2
+        assert analyzer._cache_name is None
+
+
+class TestAnalyze:
+    def test_batch_mode_yields_in_key_order(self):
+        analyzer = _make_analyzer()
+        found = IdentifyResult(cats_present=True, confidence=0.9)
+        with patch.object(analyzer, "analyze_batch", return_value={"b.jpg": found}) as batch:
+
+            async def _collect():
+                return [
+                    item async for item in analyzer.analyze(
+                        ["a.jpg", "b.jpg"], str.encode, mode="batch"
+                    )
+                ]
+
+            results = asyncio.run(_collect())
+
+        assert list(batch.call_args.args[0]) == [("a.jpg", b"a.jpg"), ("b.jpg", b"b.jpg")]
+        assert [k for k, _ in results] == ["a.jpg", "b.jpg"]
+        assert isinstance(results[0][1], RuntimeError)
+        assert results[1][1] is found
+
+    def test_live_mode_caches_prefix_for_the_run(self):
+        analyzer = _make_analyzer()
+        analyzer.client.caches.create.return_value.name = "cachedContents/abc"
+        analyzer.client.aio.models.generate_content = AsyncMock(return_value=_response(True))
+
+        async def _collect():
+            return [item async for item in analyzer.analyze(["a"], str.encode)]
+
+        [(_, result)] = asyncio.run(_collect())
+        assert result.cats_present is True
+        analyzer.client.caches.delete.assert_called_once_with(name="cachedContents/abc")
+        assert analyzer._cache_name is None
+
+
+class TestAnalyzeBatch:
+    def test_round_trip(self):
+        analyzer = _make_analyzer()
+        client = analyzer.client
+        client.files.upload.return_value = MagicMock(name="files/src", uri="https://files/x")
+        job = MagicMock()
+        job.name = "batches/1"
+        job.state.name = "JOB_STATE_SUCCEEDED"
+        client.batches.create.return_value = job
+        out_lines = [
+            {
+                "key": "a.jpg",
+                "response": {"candidates": [{"content": {"parts": [
+                    {"text": json.dumps({"cats_present": True, "cats": []})}
+                ]}}]},
+            },
+            {"key": "b.jpg", "error": {"code": 500}},
+        ]
+        client.files.download.return_value = "\n".join(
+            json.dumps(line) for line in out_lines
+        ).encode()
+
+        results = analyzer.analyze_batch([("a.jpg", b"a"), ("b.jpg", b"b")])
+
+        assert set(results) == {"a.jpg"}
+        assert results["a.jpg"].cats_present is True
+        client.batches.get.assert_not_called()
+        # one reference upload + the JSONL source, and the reference is cleaned up
+        assert client.files.upload.call_count == 2
+        client.files.delete.assert_called_once()
+
+    def test_lines_reference_uploaded_files(self):
+        analyzer = _make_analyzer()
+        client = analyzer.client
+        lines: list[dict] = []
+
+        def _upload(file, config):
+            if isinstance(file, Path):
+                lines.extend(json.loads(l) for l in file.read_text().splitlines())
+            ref = MagicMock()
+            ref.uri = "https://files/ref"
+            return ref
+
+        client.files.upload.side_effect = _upload
+        client.batches.create.return_value.state.name = "JOB_STATE_SUCCEEDED"
+        client.files.download.return_value = b""
+
+        analyzer.analyze_batch([("a.jpg", b"a")])
+
+        parts = lines[0]["request"]["contents"][0]["parts"]
+        assert {"file_data": {"mime_type": "image/jpeg", "file_uri": "https://files/ref"}} in parts
+        assert parts[-1]["inline_data"]["data"]  # test frame stays inline
@@ -0,0 +1,85 @@
+"""Tests for ffmpeg capture helpers."""
+
+import os
+import selectors
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+from src.capture import (
+    CAPTURE_HEIGHT,
+    CAPTURE_WIDTH,
+    _read_exact,
+    build_ffmpeg_cmd,
+    prefetch_frames,
+)
+
+
+@pytest.fixture
+def pipe():
+    r, w = os.pipe()
+    reader = open(r, "rb", buffering=0)
+    writer = open(w, "wb", buffering=0)
+    sel = selectors.DefaultSelector()
+    sel.register(reader, selectors.EVENT_READ)
+    yield reader, writer, sel
+    sel.close()
+    reader.close()
+    if not writer.closed:
+        writer.close()
+
+
+class TestReadExact:
+    def test_fills_buffer(self, pipe):
+        reader, writer, sel = pipe
+        writer.write(b"abcdef")
+        buf = bytearray(6)
+        assert _read_exact(reader, sel, memoryview(buf), timeout=1) == 6
+        assert bytes(buf) == b"abcdef"
+
+    def test_short_read_on_eof(self, pipe):
+        reader, writer, sel = pipe
+        writer.write(b"abc")
+        writer.close()
+        buf = bytearray(6)
+        assert _read_exact(reader, sel, memoryview(buf), timeout=1) == 3
+
+    def test_timeout_when_no_data(self, pipe):
+        reader, _, sel = pipe
+        with pytest.raises(TimeoutError):
+            _read_exact(reader, sel, memoryview(bytearray(4)), timeout=0.01)
+
+
+class TestFfmpegCmd:
+    def test_interval_and_url(self):
+        cmd = build_ffmpeg_cmd("rtmp://cam/live", 5)
+        assert cmd[cmd.index("-i") + 1] == "rtmp://cam/live"
+        assert cmd[cmd.index("-vf") + 1].startswith("fps=1/5,")
+
+
+def _fake_capture(values):
+    """Yield one shared buffer filled with each value, like capture_frames does."""
+    def gen(*_args, **_kwargs):
+        buf = np.empty((CAPTURE_HEIGHT, CAPTURE_WIDTH, 3), dtype=np.uint8)
+        for v in values:
+            buf[:] = v
+            yield buf
+        raise RuntimeError("stream ended")
+    return gen
+
+
+class TestPrefetchFrames:
+    def test_frames_are_independent_copies(self):
+        with patch("src.capture.capture_frames", _fake_capture([1, 2])):
+            frames = prefetch_frames("rtmp://x", depth=4)
+            first = next(frames)
+            assert first[0, 0, 0] == 1
+            second = next(frames)
+            assert second[0, 0, 0] == 2
+            assert first is not second
+
+    def test_reader_error_propagates(self):
+        with patch("src.capture.capture_frames", _fake_capture([])):
+            with pytest.raises(RuntimeError, match="stream ended"):
+                next(prefetch_frames("rtmp://x"))
@@ -0,0 +1,100 @@
+"""Tests for Supabase retention cleanup."""
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from src.cleanup import _purge_event_files, main, run_cleanup
+
+
+class TestPurgeEventFiles:
+    def test_removes_all_files_in_event_folder(self):
+        storage = MagicMock()
+        bucket = storage.client.storage.from_.return_value
+        bucket.list.return_value = [{"name": "a.jpg"}, {"name": "b.jpg"}]
+
+        assert _purge_event_files(storage, "evt-1") == 2
+        bucket.remove.assert_called_once_with(["evt-1/a.jpg", "evt-1/b.jpg"])
+
+    def test_empty_folder(self):
+        storage = MagicMock()
+        storage.client.storage.from_.return_value.list.return_value = []
+
+        assert _purge_event_files(storage, "evt-1") == 0
+        storage.client.storage.from_.return_value.remove.assert_not_called()
+
+    def test_error_is_logged_not_raised(self, capsys):
+        storage = MagicMock()
+        storage.client.storage.from_.return_value.list.side_effect = Exception("boom")
+
+        assert _purge_event_files(storage, "evt-1") is None
+        assert "evt-1" in capsys.readouterr().out
+
+
+def _old_events(storage: MagicMock, ids: list[str]) -> None:
+    query = storage.client.table.return_value.select.return_value.lt.return_value
+    query.execute.return_value = MagicMock(data=[{"id": eid} for eid in ids])
+
+
+class TestRunCleanup:
+    @patch("src.cleanup.PurrviewStorage")
+    def test_purges_storage_then_deletes_via_rpc(self, mock_storage_cls):
+        storage = mock_storage_cls.return_value
+        _old_events(storage, ["evt-1", "evt-2"])
+        storage.client.rpc.return_value.execute.return_value = MagicMock(
+            data=[{"id": "evt-1"}, {"id": "evt-2"}]
+        )
+        bucket = storage.client.storage.from_.return_value
+        bucket.list.return_value = [{"name": "a.jpg"}]
+
+        assert run_cleanup(retention_days=14) == []
+
+        assert bucket.remove.call_count == 2
+        rpc_name, params = storage.client.rpc.call_args[0]
+        assert rpc_name == "purrview_delete_events"
+        assert params == {"event_ids": ["evt-1", "evt-2"]}
+
+    @patch("src.cleanup.PurrviewStorage")
+    def test_failed_purge_keeps_event(self, mock_storage_cls):
+        storage = mock_storage_cls.return_value
+        _old_events(storage, ["evt-1", "evt-2"])
+        storage.client.rpc.return_value.execute.return_value = MagicMock(data=[{"id": "evt-2"}])
+        bucket = storage.client.storage.from_.return_value
+
+        def _list(eid):
+            if eid == "evt-1":
+                raise Exception("boom")
+            return [{"name": "a.jpg"}]
+
+        bucket.list.side_effect = _list
+
+        assert run_cleanup(retention_days=14) == ["evt-1"]
+
+        _, params = storage.client.rpc.call_args[0]
+        assert params == {"event_ids": ["evt-2"]}
+
+    @patch("src.cleanup.PurrviewStorage")
+    def test_all_purges_failed_deletes_nothing(self, mock_storage_cls):
+        storage = mock_storage_cls.return_value
+        _old_events(storage, ["evt-1"])
+        storage.client.storage.from_.return_value.list.side_effect = Exception("boom")
+
+        assert run_cleanup(retention_days=14) == ["evt-1"]
+        storage.client.rpc.assert_not_called()
+
+    @patch("src.cleanup.PurrviewStorage")
+    def test_dry_run_does_not_delete(self, mock_storage_cls):
+        storage = mock_storage_cls.return_value
+        _old_events(storage, ["evt-1", "evt-2", "evt-3"])
+
+        run_cleanup(retention_days=14, dry_run=True)
+
+        storage.client.rpc.assert_not_called()
+        storage.client.storage.from_.return_value.remove.assert_not_called()
+
+    @patch("src.cleanup.run_cleanup", return_value=["evt-1"])
+    def test_main_exits_nonzero_on_failed_purge(self, _mock_run, monkeypatch):
+        monkeypatch.setattr("sys.argv", ["cleanup"])
+        with pytest.raises(SystemExit) as exc:
+            main()
+        assert exc.value.code == 1
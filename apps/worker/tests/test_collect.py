@@ -0,0 +1,72 @@
+"""Tests for collect's frame-diff motion score and frame writes."""
+
+from concurrent.futures import Future
+
+import numpy as np
+import pytest
+
+from src.collect import (
+    MOTION_DOWNSCALE,
+    _write_frame,
+    _write_succeeded,
+    compute_motion_score,
+    motion_frame,
+)
+
+
+class TestMotionFrame:
+    def test_small_grayscale(self):
+        frame = np.zeros((720, 1280, 3), dtype=np.uint8)
+        small = motion_frame(frame)
+        assert small.shape == (720 // MOTION_DOWNSCALE, 1280 // MOTION_DOWNSCALE)
+        assert small.dtype == np.uint8
+
+    def test_does_not_alias_input(self):
+        frame = np.zeros((720, 1280, 3), dtype=np.uint8)
+        small = motion_frame(frame)
+        frame[:] = 255
+        assert small.max() == 0
+
+
+class TestComputeMotionScore:
+    def test_first_frame_is_zero(self):
+        frame = np.zeros((720, 1280, 3), dtype=np.uint8)
+        assert compute_motion_score(motion_frame(frame), None) == 0
+
+    def test_identical_frames(self):
+        frame = np.random.randint(0, 255, (720, 1280, 3), dtype=np.uint8)
+        small = motion_frame(frame)
+        assert compute_motion_score(small, small) == 0
+
+    def test_score_in_full_resolution_pixels(self):
+        prev = np.zeros((720, 1280, 3), dtype=np.uint8)
+        cur = prev.copy()
+        cur[100:200, 200:400] = 255  # 20,000 changed pixels
+        score = compute_motion_score(motion_frame(cur), motion_frame(prev))
+        assert score == 100 * 200
+
+
+class TestWriteFrame:
+    def test_writes_frame_and_thumb(self, tmp_path):
+        frame = np.zeros((720, 1280, 3), dtype=np.uint8)
+        _write_frame(frame, tmp_path / "a.jpg", tmp_path / "a_thumb.jpg")
+        assert (tmp_path / "a.jpg").stat().st_size > 0
+        assert (tmp_path / "a_thumb.jpg").stat().st_size > 0
+
+    def test_unwritable_path_raises(self, tmp_path):
+        frame = np.zeros((720, 1280, 3), dtype=np.uint8)
+        with pytest.raises(OSError):
+            _write_frame(frame, tmp_path / "missing" / "a.jpg", tmp_path / "a_thumb.jpg")
+
+
+class TestWriteSucceeded:
+    def test_ok(self):
+        future = Future()
+        future.set_result(None)
+        assert _write_succeeded(future)
+
+    def test_failure_is_logged(self, capsys):
+        future = Future()
+        future.set_exception(OSError("disk full"))
+        assert not _write_succeeded(future)
+        assert "disk full" in capsys.readouterr().out
@@ -62,3 +62,10 @@ class TestMotionDetector:
             detector.detect(frame, roi)
         detected, _ = detector.detect(frame, roi)
         assert not detected
+
+    def test_first_frame_seeds_background(self, detector, roi):
+        """The first frame becomes the background, so it reports no motion."""
+        frame = make_frame(color=(200, 50, 50))
+        detected, count = detector.detect(frame, roi)
+        assert not detected
+        assert count == 0
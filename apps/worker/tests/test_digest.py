@@ -1,11 +1,12 @@
 """Tests for daily digest module."""
 
+from collections import Counter
 from datetime import datetime, timezone
 from unittest.mock import MagicMock, patch
 
 import pytest
 
-from src.digest import build_digest, _query_daily_counts
+from src.digest import build_digest, _query_digest_counts
 
 
 @pytest.fixture
@@ -23,38 +24,54 @@ def _make_execute_result(data, count=None):
     return result
 
 
-class TestQueryDailyCounts:
-    def test_groups_by_cat_and_activity(self, mock_storage):
-        mock_storage.client.table.return_value.select.return_value.gte.return_value.lt.return_value.execute.return_value = _make_execute_result([
-            {"cat_name": "大吉", "activity": "eating"},
-            {"cat_name": "大吉", "activity": "eating"},
-            {"cat_name": "大吉", "activity": "drinking"},
-            {"cat_name": "小黑", "activity": "eating"},
+def _group_rows(bucket, events):
+    """Aggregate raw event dicts the way purrview_digest_counts does."""
+    counts = Counter((e["cat_name"], e["activity"]) for e in events)
+    return [
+        {"bucket": bucket, "cat_name": c, "activity": a, "n": n}
+        for (c, a), n in counts.items()
+    ]
+
+
+class TestQueryDigestCounts:
+    def test_groups_by_bucket_cat_and_activity(self, mock_storage):
+        mock_storage.client.rpc.return_value.execute.return_value = _make_execute_result([
+            {"bucket": "yesterday", "cat_name": "大吉", "activity": "eating", "n": 2},
+            {"bucket": "yesterday", "cat_name": "大吉", "activity": "drinking", "n": 1},
+            {"bucket": "week", "cat_name": "大吉", "activity": "eating", "n": 9},
+            {"bucket": "week", "cat_name": "小黑", "activity": "eating", "n": 1},
+            {"bucket": "frames", "cat_name": None, "activity": None, "n": 7},
         ])
-        counts = _query_daily_counts(mock_storage, "2026-02-20", "2026-02-21")
-        assert counts["大吉"]["eating"] == 2
-        assert counts["大吉"]["drinking"] == 1
-        assert counts["小黑"]["eating"] == 1
+        day, week, frames = _query_digest_counts(
+            mock_storage, "2026-02-13", "2026-02-20", "2026-02-21"
+        )
+        assert day["大吉"] == {"eating": 2, "drinking": 1}
+        assert "小黑" not in day
+        assert week["大吉"]["eating"] == 9
+        assert week["小黑"]["eating"] == 1
+        assert frames == 7
+        mock_storage.client.rpc.assert_called_once_with(
+            "purrview_digest_counts",
+            {"week_start": "2026-02-13", "day_start": "2026-02-20", "day_end": "2026-02-21"},
+        )
 
     def test_empty_result(self, mock_storage):
-        mock_storage.client.table.return_value.select.return_value.gte.return_value.lt.return_value.execute.return_value = _make_execute_result([])
-        counts = _query_daily_counts(mock_storage, "2026-02-20", "2026-02-21")
-        assert counts == {}
+        mock_storage.client.rpc.return_value.execute.return_value = _make_execute_result([])
+        result = _query_digest_counts(mock_storage, "2026-02-13", "2026-02-20", "2026-02-21")
+        assert result == ({}, {}, 0)
 
 
 class TestBuildDigest:
     def _setup_storage(self, mock_storage, yesterday_data, week_data, frame_count=0):
-        """Set up mock to return different data for three calls:
-        1. yesterday event counts
-        2. week event counts
-        3. frame count (for Gemini call estimation)
+        """Set up the purrview_digest_counts rpc result.
+
+        Event lists are aggregated into the rpc's (bucket, cat_name, activity, n)
+        rows, followed by the frame-count row (for Gemini call estimation).
         """
-        results = [
-            _make_execute_result(yesterday_data),
-            _make_execute_result(week_data),
-            _make_execute_result([], count=frame_count),
-        ]
-        mock_storage.client.table.return_value.select.return_value.gte.return_value.lt.return_value.execute.side_effect = results
+        frames = {"bucket": "frames", "cat_name": None, "activity": None, "n": frame_count}
+        mock_storage.client.rpc.return_value.execute.return_value = _make_execute_result(
+            _group_rows("yesterday", yesterday_data) + _group_rows("week", week_data) + [frames]
+        )
 
     @patch("src.digest._get_worker_status", return_value="active")
     def test_normal_day(self, _mock_status, mock_storage):
@@ -0,0 +1,124 @@
+"""Tests for eval_identify's description parsing and entrypoint."""
+
+import json
+import re
+
+import numpy as np
+import pytest
+
+from src import config
+from src.analyzer import Activity, CatActivity, IdentifyResult, encode_frame_jpeg
+from src.eval_identify import _CAT_HINTS, _classify_text, _parse_multi_cat_activity, main
+
+
+def _substring_parse(desc: str, cats: list[str]) -> dict[str, str]:
+    """Per-cat substring scan the single-pass hint regex must agree with."""
+    segments = re.split(r"[.;,]|(?:and )", desc)
+    activities = {}
+    for cat in cats:
+        hits = [s for s in segments if any(h in s for h in _CAT_HINTS[cat])]
+        activities[cat] = _classify_text(" ".join(hits) if hits else desc)
+    return activities
+
+
+class TestParseMultiCatActivity:
+    def test_overlapping_hints_match_both_cats(self):
+        # "light brown" (大吉) and "tabby" (松花) overlap inside "light brown tabby"
+        desc = "A light brown tabby is drinking from the water fountain"
+        result = _parse_multi_cat_activity(desc, ["大吉", "松花"])
+        assert result == {"大吉": "drinking", "松花": "drinking"}
+
+    def test_darker_cat_is_not_dark_cat(self):
+        desc = "The darker cat eats from the food bowl. A calico sits nearby"
+        result = _parse_multi_cat_activity(desc, ["麻酱", "小黑", "小慢"])
+        assert result["麻酱"] == "eating"
+        assert result["小慢"] == "present"
+        # No 小黑 hint anywhere: falls back to the whole description
+        assert result["小黑"] == "eating"
+
+    def test_multiple_segments_per_cat(self):
+        desc = (
+            "An orange cat stands by the bowl. A black cat drinks from the water fountain; "
+            "the orange cat then eats"
+        )
+        result = _parse_multi_cat_activity(desc, ["大吉", "小黑"])
+        assert result == {"大吉": "eating", "小黑": "drinking"}
+
+    def test_and_splits_segments(self):
+        desc = "A calico eats from the food bowl and a tortoiseshell waits"
+        result = _parse_multi_cat_activity(desc, ["小慢", "麻酱"])
+        assert result == {"小慢": "eating", "麻酱": "present"}
+
+    @pytest.mark.parametrize(
+        "desc",
+        [
+            "A light brown tabby is drinking from the water fountain",
+            "The darker cat eats. A dark cat drinks from the water bowl",
+            "A light orange cat and a brown tabby eat, a dark-colored cat drinks",
+            "A striped cat; a light-colored cat eating; a calico at the water dispenser",
+            "Two cats: black and tortoiseshell, both near the food bowl",
+            "No hints here, just a cat drinking",
+        ],
+    )
+    def test_matches_substring_scan(self, desc):
+        cats = list(_CAT_HINTS)
+        assert _parse_multi_cat_activity(desc, cats) == _substring_parse(desc, cats)
+
+
+class _FakeAnalyzer:
+    """Stands in for CatAnalyzer: reads each frame, answers 大吉 eating."""
+
+    instances: list["_FakeAnalyzer"] = []
+
+    def __init__(self, **kwargs):
+        self.kwargs = kwargs
+        self.frames: list[bytes] = []
+        _FakeAnalyzer.instances.append(self)
+
+    async def analyze(self, keys, load, mode="live", concurrency=8):
+        for key in keys:
+            self.frames.append(load(key))
+            cat = CatActivity(name="大吉", activity=Activity.EATING)
+            yield key, IdentifyResult(cats_present=True, cats=[cat], confidence=0.9)
+
+
+@pytest.fixture
+def gemini_key_only(monkeypatch):
+    """Only GEMINI_API_KEY configured: no Supabase/RTMP settings, no .env."""
+    for var in ("SUPABASE_URL", "SUPABASE_KEY", "RTMP_URL", "FRAME_ROI", "INFER_MAX_EDGE"):
+        monkeypatch.delenv(var, raising=False)
+    monkeypatch.setenv("GEMINI_API_KEY", "test-key")
+    monkeypatch.setitem(config.InferenceSettings.model_config, "env_file", None)
+    monkeypatch.setattr(config, "_settings", None)
+    monkeypatch.setattr(config, "_inference_settings", None)
+    _FakeAnalyzer.instances.clear()
+
+
+class TestMain:
+    def test_runs_with_only_gemini_key(self, gemini_key_only, tmp_path, monkeypatch):
+        date_dir = tmp_path / "2026-02-10"
+        date_dir.mkdir()
+        frame = encode_frame_jpeg(np.zeros((1080, 1920, 3), dtype=np.uint8))
+        labels = {f"{i:02d}.jpg": ["大吉"] for i in range(5)}
+        for fname in labels:
+            (date_dir / fname).write_bytes(frame)
+        (date_dir / "labels.json").write_text(json.dumps(labels))
+        (date_dir / "gallery_meta.jsonl").write_text("".join(
+            json.dumps({"filename": f, "timestamp": f"2026-02-10T00:00:{i:02d}",
+                        "cat_description": "eating from the food bowl"}) + "\n"
+            for i, f in enumerate(labels)
+        ))
+        monkeypatch.setattr("src.eval_identify.CatAnalyzer", _FakeAnalyzer)
+        monkeypatch.setattr(
+            "sys.argv", ["eval_identify", "--date", "2026-02-10", "--output", str(tmp_path)]
+        )
+
+        main()
+
+        (analyzer,) = _FakeAnalyzer.instances
+        assert analyzer.kwargs["ref_max_edge"] == 768
+        assert len(analyzer.frames) == 2  # 5 labeled frames minus 3 references
+        # Frames get the default INFER_MAX_EDGE downscale
+        assert all(len(f) < len(frame) for f in analyzer.frames)
+        rows = (date_dir / "eval_results.jsonl").read_text().splitlines()
+        assert [json.loads(r)["match"] for r in rows] == [True, True]
@@ -0,0 +1,27 @@
+"""Tests for the frame-directory helpers shared by the offline tools."""
+
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from src.frames import list_frame_files
+
+
+class TestListFrameFiles:
+    def test_files_only(self, tmp_path):
+        (tmp_path / "a.jpg").write_bytes(b"")
+        (tmp_path / "gallery_meta.jsonl").write_text("")
+        (tmp_path / "thumbs").mkdir()
+        assert list_frame_files(tmp_path) == {"a.jpg", "gallery_meta.jsonl"}
+
+
+@pytest.mark.parametrize("module", ["src.label", "src.replay", "src.eval_identify"])
+def test_offline_tools_skip_capture_pipeline(module):
+    # A fresh interpreter, so modules imported by other tests don't count
+    code = (
+        f"import sys, {module}; "
+        "assert 'src.capture' not in sys.modules and 'src.collect' not in sys.modules"
+    )
+    subprocess.run([sys.executable, "-c", code], check=True, cwd=Path(__file__).parents[1])
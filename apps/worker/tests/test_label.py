@@ -0,0 +1,86 @@
+"""Tests for offline labeling's crash-recovery log."""
+
+import json
+
+from src.label import _apply_updates, run_labeling
+
+
+def _write_jsonl(path, rows, tail=""):
+    path.write_text("".join(json.dumps(r) + "\n" for r in rows) + tail)
+
+
+def _read_jsonl(path):
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+_LABEL = {"cat_detected": True, "cat_count": 1, "cat_description": "eating", "confidence": 0.9}
+
+
+class TestApplyUpdates:
+    def test_missing_file(self, tmp_path):
+        entries = [{"filename": "a.jpg"}]
+        assert _apply_updates(entries, tmp_path / "label_updates.jsonl") == 0
+        assert entries == [{"filename": "a.jpg"}]
+
+    def test_torn_last_line_is_skipped(self, tmp_path):
+        updates = tmp_path / "label_updates.jsonl"
+        _write_jsonl(
+            updates,
+            [{"filename": "a.jpg", **_LABEL}, {"filename": "b.jpg", "cat_detected": False}],
+            tail='{"filename": "c.jpg", "cat_dete',
+        )
+        entries = [{"filename": "a.jpg"}, {"filename": "b.jpg"}, {"filename": "c.jpg"}]
+
+        assert _apply_updates(entries, updates) == 2
+        assert entries[0] == {"filename": "a.jpg", **_LABEL}
+        assert entries[1] == {"filename": "b.jpg", "cat_detected": False}
+        assert entries[2] == {"filename": "c.jpg"}
+
+    def test_unknown_filename_is_ignored(self, tmp_path):
+        updates = tmp_path / "label_updates.jsonl"
+        _write_jsonl(updates, [{"filename": "gone.jpg", **_LABEL}])
+        entries = [{"filename": "a.jpg"}]
+
+        assert _apply_updates(entries, updates) == 0
+        assert entries == [{"filename": "a.jpg"}]
+
+
+class TestRecovery:
+    def _setup(self, tmp_path):
+        date_dir = tmp_path / "2026-02-09"
+        date_dir.mkdir()
+        # c.jpg is below min_score, so nothing is left to label after recovery
+        _write_jsonl(date_dir / "gallery_meta.jsonl", [
+            {"filename": "a.jpg", "motion_score": 9000},
+            {"filename": "b.jpg", "motion_score": 9000},
+            {"filename": "c.jpg", "motion_score": 0},
+        ])
+        _write_jsonl(
+            date_dir / "label_updates.jsonl",
+            [{"filename": "a.jpg", **_LABEL}, {"filename": "b.jpg", **_LABEL}],
+            tail='{"filename": "c.jpg"',
+        )
+        return date_dir
+
+    def test_partial_log_is_compacted_into_meta(self, tmp_path):
+        date_dir = self._setup(tmp_path)
+
+        run_labeling("2026-02-09", output_dir=str(tmp_path))
+
+        assert not (date_dir / "label_updates.jsonl").exists()
+        assert not (date_dir / "gallery_meta.jsonl.tmp").exists()
+        assert _read_jsonl(date_dir / "gallery_meta.jsonl") == [
+            {"filename": "a.jpg", "motion_score": 9000, **_LABEL},
+            {"filename": "b.jpg", "motion_score": 9000, **_LABEL},
+            {"filename": "c.jpg", "motion_score": 0},
+        ]
+
+    def test_dry_run_leaves_files_alone(self, tmp_path):
+        date_dir = self._setup(tmp_path)
+        meta_before = (date_dir / "gallery_meta.jsonl").read_text()
+        updates_before = (date_dir / "label_updates.jsonl").read_text()
+
+        run_labeling("2026-02-09", output_dir=str(tmp_path), dry_run=True)
+
+        assert (date_dir / "gallery_meta.jsonl").read_text() == meta_before
+        assert (date_dir / "label_updates.jsonl").read_text() == updates_before
@@ -2,7 +2,12 @@
 
 from unittest.mock import MagicMock, patch
 
-from src.main import _handle_completed, encode_frame_jpeg
+from src.main import (
+    GateStats,
+    _handle_completed,
+    encode_frame_jpeg,
+    prepare_inference_frame,
+)
 from src.tracker import FeedingSession
 
 import numpy as np
@@ -23,6 +28,31 @@ class TestEncodeFrameJpeg:
         assert len(low_q) < len(high_q)
 
 
+class TestPrepareInferenceFrame:
+    def test_downscales_keeping_aspect(self):
+        frame = np.zeros((720, 1280, 3), dtype=np.uint8)
+        assert prepare_inference_frame(frame, None, 640).shape == (360, 640, 3)
+
+    def test_crops_roi(self):
+        frame = np.zeros((720, 1280, 3), dtype=np.uint8)
+        frame[100:200, 50:250] = 255
+        out = prepare_inference_frame(frame, (50, 100, 200, 100), 768)
+        assert out.shape == (100, 200, 3)
+        assert out.min() == 255
+
+    def test_no_upscale(self):
+        frame = np.zeros((100, 200, 3), dtype=np.uint8)
+        assert prepare_inference_frame(frame, None, 768).shape == (100, 200, 3)
+
+
+class TestGateStats:
+    def test_summary_counts_skipped(self):
+        stats = GateStats(frames=300, motion=12, gemini=4)
+        assert stats.summary() == (
+            "300 frames, 12 over motion threshold, 4 Gemini calls (296 skipped)"
+        )
+
+
 class TestHandleCompleted:
     def test_saves_and_notifies(self):
         session = FeedingSession(
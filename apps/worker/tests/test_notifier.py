@@ -35,7 +35,7 @@ class TestLarkNotifierCards:
             last_seen_at=1420.0,
         )
 
-        with patch("src.notifier.httpx.post") as mock_post:
+        with patch.object(notifier._client, "post") as mock_post:
             mock_resp = MagicMock()
             mock_resp.json.return_value = {"code": 0}
             mock_post.return_value = mock_resp
@@ -55,7 +55,7 @@ class TestLarkNotifierCards:
         notifier = LarkNotifier(webhook_url="https://open.feishu.cn/hook/test")
         payload = {"msg_type": "text", "content": {"text": "test"}}
 
-        with patch("src.notifier.httpx.post") as mock_post:
+        with patch.object(notifier._client, "post") as mock_post:
             mock_resp = MagicMock()
             mock_resp.json.return_value = {"code": 0}
             mock_post.return_value = mock_resp
@@ -66,5 +66,5 @@ class TestLarkNotifierCards:
         notifier = LarkNotifier(webhook_url="https://open.feishu.cn/hook/test")
         payload = {"msg_type": "text", "content": {"text": "test"}}
 
-        with patch("src.notifier.httpx.post", side_effect=Exception("connection error")):
+        with patch.object(notifier._client, "post", side_effect=Exception("connection error")):
             assert notifier._post_to_lark(payload) is False
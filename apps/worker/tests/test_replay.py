@@ -0,0 +1,69 @@
+"""Tests for the replay entrypoint."""
+
+import json
+
+import numpy as np
+import pytest
+
+from src import config
+from src.analyzer import Activity, CatActivity, IdentifyResult, encode_frame_jpeg
+from src.replay import main
+
+
+class _FakeAnalyzer:
+    """Stands in for CatAnalyzer: reads each frame, answers 大吉 eating."""
+
+    instances: list["_FakeAnalyzer"] = []
+
+    def __init__(self, **kwargs):
+        self.kwargs = kwargs
+        self.frames: list[bytes] = []
+        _FakeAnalyzer.instances.append(self)
+
+    async def analyze(self, keys, load, mode="live", concurrency=8):
+        for key in keys:
+            self.frames.append(load(key))
+            cat = CatActivity(name="大吉", activity=Activity.EATING)
+            yield key, IdentifyResult(cats_present=True, cats=[cat], confidence=0.9)
+
+
+@pytest.fixture
+def gemini_key_only(monkeypatch):
+    """Only GEMINI_API_KEY configured: no Supabase/RTMP settings, no .env."""
+    for var in ("SUPABASE_URL", "SUPABASE_KEY", "RTMP_URL", "FRAME_ROI", "INFER_MAX_EDGE"):
+        monkeypatch.delenv(var, raising=False)
+    monkeypatch.setenv("GEMINI_API_KEY", "test-key")
+    monkeypatch.setitem(config.InferenceSettings.model_config, "env_file", None)
+    monkeypatch.setattr(config, "_settings", None)
+    monkeypatch.setattr(config, "_inference_settings", None)
+    _FakeAnalyzer.instances.clear()
+
+
+class TestMain:
+    def test_runs_with_only_gemini_key(self, gemini_key_only, tmp_path, monkeypatch, capsys):
+        date_dir = tmp_path / "2026-02-10"
+        date_dir.mkdir()
+        frame = encode_frame_jpeg(np.zeros((1080, 1920, 3), dtype=np.uint8))
+        entries = [
+            {"filename": f"{i:02d}.jpg", "timestamp": f"2026-02-10T00:{i:02d}:00",
+             "motion_score": 9000}
+            for i in range(3)
+        ]
+        for e in entries:
+            (date_dir / e["filename"]).write_bytes(frame)
+        (date_dir / "gallery_meta.jsonl").write_text(
+            "".join(json.dumps(e) + "\n" for e in entries)
+        )
+        monkeypatch.setattr("src.replay.CatAnalyzer", _FakeAnalyzer)
+        monkeypatch.setattr(
+            "sys.argv", ["replay", "--date", "2026-02-10", "--output", str(tmp_path)]
+        )
+
+        main()
+
+        (analyzer,) = _FakeAnalyzer.instances
+        assert analyzer.kwargs["ref_max_edge"] == 768
+        assert len(analyzer.frames) == 3
+        # Frames get the default INFER_MAX_EDGE downscale
+        assert all(len(f) < len(frame) for f in analyzer.frames)
+        assert "[replay] Gemini calls: 3" in capsys.readouterr().out
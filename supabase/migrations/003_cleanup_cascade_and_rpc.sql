@@ -0,0 +1,18 @@
+-- Retention cleanup in one round-trip
+-- Frames are deleted with their event, and purged events are removed server-side
+
+-- Cascade frame rows when their feeding event is deleted
+alter table purrview_frames drop constraint purrview_frames_feeding_event_id_fkey;
+alter table purrview_frames
+  add constraint purrview_frames_feeding_event_id_fkey
+  foreign key (feeding_event_id) references purrview_feeding_events(id) on delete cascade;
+
+-- Delete the given events (the ones whose storage was purged) and return their ids
+create or replace function purrview_delete_events(event_ids uuid[])
+returns table (id uuid)
+language sql
+as $$
+  delete from purrview_feeding_events e
+  where e.id = any(event_ids)
+  returning e.id;
+$$;
@@ -0,0 +1,26 @@
+-- Digest aggregation server-side, in one round-trip
+-- Returns one row per (window, cat, activity) instead of every event, plus
+-- yesterday's frame count (bucket 'frames', cat_name/activity null)
+
+create or replace function purrview_digest_counts(
+  week_start timestamptz,
+  day_start timestamptz,
+  day_end timestamptz
+)
+returns table (bucket text, cat_name text, activity text, n bigint)
+language sql
+stable
+as $$
+  select
+    case when e.started_at >= day_start then 'yesterday' else 'week' end,
+    coalesce(e.cat_name, 'Unknown'),
+    coalesce(e.activity, 'eating'),
+    count(*)
+  from purrview_feeding_events e
+  where e.started_at >= week_start and e.started_at < day_end
+  group by 1, 2, 3
+  union all
+  select 'frames', null, null, count(*)
+  from purrview_frames f
+  where f.captured_at >= day_start and f.captured_at < day_end;
+$$;